@@ -0,0 +1,73 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+
+from accounts.models import CustomUser, Follow
+from accounts.services.graph import FollowGraph
+
+
+class Command(BaseCommand):
+    help = "Compare the in-memory follow graph with the ORM for mutual, degree and friends-of-friends lookups."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--samples", type=int, default=200)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        user_ids = list(CustomUser.objects.values_list("id", flat=True))
+        if len(user_ids) < 2:
+            raise CommandError("Need at least two users to benchmark.")
+
+        rng = random.Random(options["seed"])
+        pairs = [tuple(rng.sample(user_ids, 2)) for _ in range(options["samples"])]
+
+        graph = FollowGraph()
+        started = time.perf_counter()
+        graph.load()
+        load_ms = (time.perf_counter() - started) * 1000
+        self.stdout.write(
+            f"Snapshot: {Follow.objects.count()} edges, {graph.nbytes() / 1024:.1f} KiB, loaded in {load_ms:.1f} ms"
+        )
+
+        benchmarks = [
+            ("mutual followers", self.orm_mutual, lambda a, b: graph.mutual_followers(a, b)),
+            ("degree", self.orm_degree, lambda a, b: graph.degree(a)),
+            ("friends of friends", self.orm_friends_of_friends, lambda a, b: graph.friends_of_friends(a)),
+        ]
+        for name, orm_fn, graph_fn in benchmarks:
+            orm_us = self.time_per_call(orm_fn, pairs)
+            graph_us = self.time_per_call(graph_fn, pairs)
+            self.stdout.write(
+                f"{name:<20} orm {orm_us:>10.1f} us   graph {graph_us:>8.1f} us   x{orm_us / max(graph_us, 1e-9):.0f}"
+            )
+
+    def time_per_call(self, fn, pairs):
+        started = time.perf_counter()
+        for a, b in pairs:
+            fn(a, b)
+        return (time.perf_counter() - started) * 1e6 / len(pairs)
+
+    def orm_mutual(self, a, b):
+        other_followers = Follow.objects.filter(followee_id=b).values_list("follower_id", flat=True)
+        return set(
+            Follow.objects.filter(followee_id=a, follower_id__in=other_followers)
+            .values_list("follower_id", flat=True)
+        )
+
+    def orm_degree(self, a, b):
+        return (
+            Follow.objects.filter(followee_id=a).count(),
+            Follow.objects.filter(follower_id=a).count(),
+        )
+
+    def orm_friends_of_friends(self, a, b):
+        following = Follow.objects.filter(follower_id=a).values_list("followee_id", flat=True)
+        return dict(
+            Follow.objects.filter(follower_id__in=following)
+            .exclude(followee_id=a)
+            .values("followee_id")
+            .annotate(n=Count("*"))
+            .values_list("followee_id", "n")
+        )
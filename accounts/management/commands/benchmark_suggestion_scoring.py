@@ -0,0 +1,84 @@
+import math
+import random
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from accounts.services import suggestion_scoring as scoring
+
+
+class Command(BaseCommand):
+    help = "Compare the per-candidate scoring loop with the vectorized NumPy scoring on synthetic candidates."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        seed = options["seed"]
+        user_lat, user_lon = 40.7, -74.0
+
+        for n in options["sizes"]:
+            rows = self.synthetic_rows(n, seed)
+
+            started = time.perf_counter()
+            loop_top = self.loop_top_k(rows, user_lat, user_lon, np.random.default_rng(seed).random(n), 20)
+            loop_ms = (time.perf_counter() - started) * 1000
+
+            started = time.perf_counter()
+            features = scoring.columns(rows)
+            columns_ms = (time.perf_counter() - started) * 1000
+            started = time.perf_counter()
+            scores = scoring.score(features, user_lat, user_lon, np.random.default_rng(seed))
+            vector_top = scoring.top_k(features["id"], scores, 20)
+            vector_ms = (time.perf_counter() - started) * 1000
+
+            same = [i for i, _ in loop_top] == [i for i, _ in vector_top]
+            self.stdout.write(
+                f"{n:>9} candidates  loop {loop_ms:>9.1f} ms   "
+                f"columns {columns_ms:>8.1f} ms + score/top-k {vector_ms:>7.1f} ms   "
+                f"x{loop_ms / (columns_ms + vector_ms):.1f} overall, x{loop_ms / vector_ms:.0f} scoring   "
+                f"same top 20: {same}"
+            )
+
+    def synthetic_rows(self, n, seed):
+        rng = random.Random(seed)
+        rows = []
+        for i in range(1, n + 1):
+            located = rng.random() < 0.7
+            rows.append((
+                i,
+                rng.randint(0, 5),
+                rng.randint(0, 5),
+                rng.randint(0, 3),
+                int(rng.random() < 0.1),
+                rng.randint(0, 10),
+                rng.uniform(40.0, 41.5) if located else None,
+                rng.uniform(-75.0, -73.0) if located else None,
+            ))
+        return rows
+
+    def loop_top_k(self, rows, user_lat, user_lon, boosts, k):
+        """The scoring loop AdvancedFollowSuggestionsView used to run, for comparison."""
+        suggestions = []
+        for (candidate_id, mutual, fbf, skills, city, trending, lat, lon), boost in zip(rows, boosts):
+            distance_score = 0
+            if user_lat and user_lon and lat and lon:
+                lat1, lon1 = math.radians(user_lat), math.radians(user_lon)
+                lat2, lon2 = math.radians(lat), math.radians(lon)
+                cos_angle = (
+                    math.cos(lat1) * math.cos(lat2) * math.cos(lon2 - lon1)
+                    + math.sin(lat1) * math.sin(lat2)
+                )
+                distance = 6371 * math.acos(max(-1.0, min(1.0, cos_angle)))
+                distance_score = max(0, 10 - (distance / 10))
+
+            score = (
+                mutual * 4 + fbf * 3 + skills * 2 + city * 2 + trending * 1
+                + distance_score * 1 + boost
+            )
+            suggestions.append((candidate_id, score))
+
+        suggestions.sort(key=lambda s: s[1], reverse=True)
+        return suggestions[:k]
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.services import notify
+
+
+class Command(BaseCommand):
+    help = "Deliver queued notification events in batches (run continuously with --forever)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=notify.DRAIN_BATCH_SIZE)
+        parser.add_argument("--forever", action="store_true", help="Keep polling the queue instead of exiting when it is empty.")
+        parser.add_argument("--interval", type=float, default=1.0, help="Seconds to sleep when the queue is empty.")
+
+    def handle(self, *args, **options):
+        delivered = 0
+        while True:
+            handled = notify.drain(options["batch_size"])
+            delivered += handled
+            if handled:
+                continue
+            if not options["forever"]:
+                break
+            time.sleep(options["interval"])
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {delivered} notification event(s)."))
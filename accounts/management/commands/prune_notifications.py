@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import Notification
+from accounts.services import notification_retention
+
+
+class Command(BaseCommand):
+    help = (
+        "Apply the notification retention policy: keep the newest "
+        "NOTIFICATION_KEEP_PER_USER notifications per user and drop read ones "
+        "older than NOTIFICATION_READ_RETENTION_DAYS."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Users pruned per batch.")
+        parser.add_argument("--keep", type=int, default=None, help="Override NOTIFICATION_KEEP_PER_USER.")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        keep = options["keep"] or notification_retention.keep_per_user()
+        cutoff = notification_retention.read_cutoff()
+
+        user_ids = list(
+            Notification.objects.order_by("user_id").values_list("user_id", flat=True).distinct()
+        )
+        deleted = 0
+        for start in range(0, len(user_ids), batch_size):
+            deleted += notification_retention.prune(user_ids[start:start + batch_size], keep=keep, cutoff=cutoff)
+
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} notification(s) for {len(user_ids)} user(s)."))
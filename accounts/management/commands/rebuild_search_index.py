@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import CustomUser
+from accounts.services.search_index import update_search_vector
+
+
+class Command(BaseCommand):
+    help = "Recompute the full-text search vector for every user."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        user_ids = list(CustomUser.objects.order_by("id").values_list("id", flat=True))
+
+        for start in range(0, len(user_ids), batch_size):
+            update_search_vector(user_ids[start:start + batch_size])
+
+        self.stdout.write(self.style.SUCCESS(f"Indexed {len(user_ids)} user(s)."))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import CustomUser
+from accounts.services import timeline
+
+
+class Command(BaseCommand):
+    help = "Rebuild the materialized feed timelines from existing gigs and reviews."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, help="Only rebuild this user's timeline.")
+        parser.add_argument("--limit", type=int, default=timeline.BACKFILL_LIMIT,
+                            help="Gigs and reviews copied per followed user.")
+
+    def handle(self, *args, **options):
+        users = CustomUser.objects.order_by("id")
+        if options["user"]:
+            users = users.filter(id=options["user"])
+
+        rebuilt = 0
+        for user in users.iterator(chunk_size=500):
+            timeline.rebuild(user, options["limit"])
+            rebuilt += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rebuilt} timeline(s)."))
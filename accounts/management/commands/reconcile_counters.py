@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from accounts.services.counters import reconcile
+
+
+class Command(BaseCommand):
+    help = "Recompute the denormalized follower / following / gig / unread notification counters and repair drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        fixed = reconcile(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Repaired counters for {fixed} user(s)."))
@@ -0,0 +1,51 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+
+from accounts.models import CustomUser, FollowSuggestionQueue
+from accounts.services import suggestions
+from accounts.services.graph import get_graph
+
+
+class Command(BaseCommand):
+    help = "Recompute precomputed follow suggestions for queued users (or everyone with --all)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Refresh every user, not just queued ones.")
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--workers", type=int, default=1, help="Processes computing batches in parallel.")
+
+    def handle(self, *args, **options):
+        started = timezone.now()
+        if options["all"]:
+            user_ids = list(CustomUser.objects.order_by("id").values_list("id", flat=True))
+        else:
+            user_ids = list(
+                FollowSuggestionQueue.objects.filter(queued_at__lte=started)
+                .order_by("user_id")
+                .values_list("user_id", flat=True)
+            )
+
+        batch_size = options["batch_size"]
+        batches = [user_ids[i:i + batch_size] for i in range(0, len(user_ids), batch_size)]
+
+        # Load the graph once here so forked workers share the snapshot.
+        get_graph().load()
+
+        if options["workers"] > 1 and len(batches) > 1:
+            # Children must open their own connections rather than reuse ours.
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=options["workers"],
+                mp_context=multiprocessing.get_context("fork"),
+            ) as pool:
+                for batch, rows in zip(batches, pool.map(suggestions.compute, batches)):
+                    suggestions.store(batch, rows, queued_before=started)
+        else:
+            for batch in batches:
+                suggestions.store(batch, suggestions.compute(batch), queued_before=started)
+
+        self.stdout.write(self.style.SUCCESS(f"Refreshed suggestions for {len(user_ids)} user(s)."))
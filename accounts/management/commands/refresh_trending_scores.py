@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from accounts.services import trending
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-apply time decay to the stored gig and review trending scores. "
+        "Run periodically (e.g. hourly from cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        updated = trending.decay_all(options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Refreshed {updated} trending score(s)."))
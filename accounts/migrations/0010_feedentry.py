@@ -0,0 +1,76 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Same cap as accounts.services.timeline.BACKFILL_LIMIT at the time of writing.
+BACKFILL_LIMIT = 200
+
+
+def backfill_timelines(apps, schema_editor):
+    """
+    Copy each author's recent gigs and reviews into their own timeline and
+    their followers', so feeds aren't empty until rebuild_timelines runs.
+    """
+    CustomUser = apps.get_model('accounts', 'CustomUser')
+    FeedEntry = apps.get_model('accounts', 'FeedEntry')
+    Gig = apps.get_model('gigs', 'Gig')
+    Review = apps.get_model('reviews', 'Review')
+    # from_customuser is the followed user, to_customuser the follower.
+    Followers = CustomUser.followers.through
+
+    sources = [('gig', Gig, 'organizer_id'), ('review', Review, 'reviewer_id')]
+    for activity_type, model, actor_field in sources:
+        actor_ids = model.objects.order_by().values_list(actor_field, flat=True).distinct()
+        for actor_id in actor_ids.iterator():
+            audience = list(
+                Followers.objects.filter(from_customuser_id=actor_id).values_list('to_customuser_id', flat=True)
+            )
+            audience.append(actor_id)
+            recent = (
+                model.objects.filter(**{actor_field: actor_id})
+                .order_by('-created_at')
+                .values_list('id', 'created_at')[:BACKFILL_LIMIT]
+            )
+            entries = [
+                FeedEntry(
+                    user_id=user_id,
+                    actor_id=actor_id,
+                    activity_type=activity_type,
+                    object_id=object_id,
+                    created_at=created_at,
+                )
+                for object_id, created_at in recent
+                for user_id in audience
+            ]
+            FeedEntry.objects.bulk_create(entries, ignore_conflicts=True, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_rename_blocked_users_customuser_blocks'),
+        ('gigs', '0001_initial'),
+        ('reviews', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('activity_type', models.CharField(choices=[('gig', 'Gig'), ('review', 'Review')], max_length=10)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('created_at', models.DateTimeField()),
+                ('actor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-created_at'], name='feed_user_created_idx'), models.Index(fields=['activity_type', 'object_id'], name='feed_activity_idx')],
+                'unique_together': {('user', 'activity_type', 'object_id')},
+            },
+        ),
+        migrations.RunPython(backfill_timelines, migrations.RunPython.noop),
+    ]
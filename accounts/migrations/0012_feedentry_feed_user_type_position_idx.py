@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0011_feedentry_position_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(fields=['user', 'activity_type', '-created_at', '-object_id'], name='feed_user_type_position_idx'),
+        ),
+    ]
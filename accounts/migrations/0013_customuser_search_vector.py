@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:26
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0012_feedentry_feed_user_type_position_idx'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('gigs', '0007_gig_hotness_gig_gig_organizer_hotness_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='user_search_vector_idx'),
+        ),
+        migrations.RunSQL(
+            sql="""
+                UPDATE accounts_customuser u SET search_vector =
+                    setweight(to_tsvector('simple', coalesce(u.username, '')), 'A')
+                    || setweight(to_tsvector('simple', coalesce((
+                        SELECT string_agg(t.name, ' ')
+                        FROM accounts_customuser_skills s
+                        JOIN gigs_tag t ON t.id = s.tag_id
+                        WHERE s.customuser_id = u.id
+                    ), '')), 'B')
+                    || setweight(to_tsvector('simple', coalesce(u.bio, '')), 'B')
+                    || setweight(to_tsvector('simple', coalesce(u.city, '')), 'C');
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
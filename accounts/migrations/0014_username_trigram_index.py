@@ -0,0 +1,22 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:28
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0013_customuser_search_vector'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('gigs', '0007_gig_hotness_gig_gig_organizer_hotness_idx'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['username'], name='user_username_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0014_username_trigram_index'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('gigs', '0007_gig_hotness_gig_gig_organizer_hotness_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['latitude', 'longitude'], name='user_lat_lng_idx'),
+        ),
+    ]
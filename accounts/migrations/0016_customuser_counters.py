@@ -0,0 +1,43 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0015_customuser_lat_lng_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='following_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='joined_gigs_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='organized_gigs_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunSQL(
+            sql="""
+                UPDATE accounts_customuser u SET
+                    followers_count = (SELECT count(*) FROM accounts_customuser_followers f WHERE f.from_customuser_id = u.id),
+                    following_count = (SELECT count(*) FROM accounts_customuser_followers f WHERE f.to_customuser_id = u.id),
+                    organized_gigs_count = (SELECT count(*) FROM gigs_gig g WHERE g.organizer_id = u.id),
+                    joined_gigs_count = (SELECT count(*) FROM gigs_gig_musicians m WHERE m.customuser_id = u.id);
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,56 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    Turn the implicit ``followers`` through table into the explicit ``Follow``
+    model. The table and its columns are kept; only ``created_at`` and the
+    (user, -created_at, -id) indexes are added to the database. Existing
+    edges get the migration time as their follow time.
+    """
+
+    dependencies = [
+        ('accounts', '0017_followsuggestion'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='Follow',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('followee', models.ForeignKey(db_column='from_customuser_id', on_delete=django.db.models.deletion.CASCADE, related_name='follower_edges', to=settings.AUTH_USER_MODEL)),
+                        ('follower', models.ForeignKey(db_column='to_customuser_id', on_delete=django.db.models.deletion.CASCADE, related_name='following_edges', to=settings.AUTH_USER_MODEL)),
+                    ],
+                    options={
+                        'db_table': 'accounts_customuser_followers',
+                        'unique_together': {('followee', 'follower')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='customuser',
+                    name='followers',
+                    field=models.ManyToManyField(blank=True, related_name='following', through='accounts.Follow', through_fields=('followee', 'follower'), to=settings.AUTH_USER_MODEL),
+                ),
+            ],
+            database_operations=[],
+        ),
+        migrations.AddField(
+            model_name='follow',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='follow',
+            index=models.Index(fields=['followee', '-created_at', '-id'], name='follow_followee_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='follow',
+            index=models.Index(fields=['follower', '-created_at', '-id'], name='follow_follower_created_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0018_follow'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='unread_notifications_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunSQL(
+            sql="""
+                UPDATE accounts_customuser u SET unread_notifications_count = (
+                    SELECT count(*) FROM accounts_notification n
+                    WHERE n.user_id = u.id AND NOT n.is_read
+                );
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
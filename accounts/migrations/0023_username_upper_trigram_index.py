@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:08
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0022_notification_coalescing'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('gigs', '0007_gig_hotness_gig_gig_organizer_hotness_idx'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='customuser',
+            name='user_username_trgm_idx',
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('username'), name='gin_trgm_ops'), name='user_username_upper_trgm_idx'),
+        ),
+    ]
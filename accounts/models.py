@@ -1,6 +1,11 @@
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
+from django.db.models.functions import Upper
 from django.conf import settings
+from django.db.models.signals import m2m_changed, post_save, pre_delete
+from django.dispatch import receiver
 
 class CustomUser(AbstractUser):
  
@@ -19,12 +24,19 @@ class CustomUser(AbstractUser):
     is_available = models.BooleanField(default=True)
     rating = models.DecimalField(max_digits=3, decimal_places=2, default=0)
     total_reviews = models.PositiveIntegerField(default=0)
+    followers_count = models.PositiveIntegerField(default=0, editable=False)
+    following_count = models.PositiveIntegerField(default=0, editable=False)
+    organized_gigs_count = models.PositiveIntegerField(default=0, editable=False)
+    joined_gigs_count = models.PositiveIntegerField(default=0, editable=False)
+    unread_notifications_count = models.PositiveIntegerField(default=0, editable=False)
     
     followers = models.ManyToManyField(
         'self',
         symmetrical=False,
         related_name='following',
-        blank=True
+        blank=True,
+        through='Follow',
+        through_fields=('followee', 'follower'),
     )
         
     blocks = models.ManyToManyField(
@@ -33,10 +45,74 @@ class CustomUser(AbstractUser):
         related_name="blocked_by",
         blank=True
     )
+    
+    search_vector = SearchVectorField(null=True, blank=True, editable=False)
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            GinIndex(fields=['search_vector'], name='user_search_vector_idx'),
+            # Matches the UPPER(username) LIKE UPPER('prefix%') that
+            # username__istartswith compiles to (autocomplete).
+            GinIndex(OpClass(Upper('username'), name='gin_trgm_ops'), name='user_username_upper_trgm_idx'),
+            models.Index(fields=['latitude', 'longitude'], name='user_lat_lng_idx'),
+        ]
 
     def __str__(self):
         return self.username
 
+    def save(self, *args, **kwargs):
+        # Counters are maintained with F() updates (accounts.services.counters);
+        # a full save of an instance loaded earlier must not write them back.
+        if not self._state.adding and kwargs.get("update_fields") is None and not args:
+            kwargs["update_fields"] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+
+COUNTER_FIELDS = {
+    "followers_count",
+    "following_count",
+    "organized_gigs_count",
+    "joined_gigs_count",
+    "unread_notifications_count",
+}
+
+class Follow(models.Model):
+    """
+    A follow edge: ``follower`` follows ``followee``.
+
+    Reuses the table and columns of the former implicit ``followers``
+    through table (``from_customuser_id`` is the followed user).
+    """
+
+    followee = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="follower_edges",
+        db_column="from_customuser_id"
+    )
+    follower = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="following_edges",
+        db_column="to_customuser_id"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'accounts_customuser_followers'
+        unique_together = ('followee', 'follower')
+        indexes = [
+            models.Index(fields=['followee', '-created_at', '-id'], name='follow_followee_created_idx'),
+            models.Index(fields=['follower', '-created_at', '-id'], name='follow_follower_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.follower_id} -> {self.followee_id}"
+
+
 class Notification(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='notifications'
@@ -44,10 +120,73 @@ class Notification(models.Model):
     message = models.CharField(max_length=225)
     created_at = models.DateTimeField(auto_now_add=True)
     is_read = models.BooleanField(default=False)
-    
+    # Coalesced notifications ("12 people applied to ...") share one row per
+    # (user, group_key); see accounts.services.notify.
+    group_key = models.CharField(max_length=100, blank=True, default='')
+    actor_count = models.PositiveIntegerField(default=1)
+    sample_actor_ids = models.JSONField(default=list, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='notif_user_created_idx'),
+            models.Index(fields=['user', 'is_read', 'created_at'], name='notif_user_read_created_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'group_key'], condition=~models.Q(group_key=''), name='notif_user_group_key_uniq'
+            ),
+        ]
+
     def __str__(self):
         return f'{self.user.username}: {self.message}'
+
+    @classmethod
+    def cleanup_for_user(cls, user):
+        """Apply the retention policy in ``accounts.services.notification_retention`` to ``user``."""
+        from accounts.services import notification_retention
+
+        return notification_retention.prune([user.id])
     
+class NotificationEvent(models.Model):
+    """
+    A queued notification, written by ``accounts.services.notify`` and turned
+    into ``Notification`` rows by the ``process_notifications`` worker.
+    """
+
+    DIRECT = 'direct'
+    FOLLOWERS = 'followers'
+    KIND_CHOICES = [
+        (DIRECT, 'Direct'),
+        (FOLLOWERS, 'All followers of actor'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, default=DIRECT)
+    recipient = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="+"
+    )
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="+"
+    )
+    message = models.CharField(max_length=225)
+    # Set for events that coalesce into one notification per recipient;
+    # grouped_message holds a "{count}" placeholder for the actor count.
+    group_key = models.CharField(max_length=100, blank=True, default='')
+    grouped_message = models.CharField(max_length=225, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        target = self.recipient_id if self.kind == self.DIRECT else f"followers of {self.actor_id}"
+        return f"{target}: {self.message}"
+
+
 class FollowRequest(models.Model):
     from_user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -68,4 +207,264 @@ class FollowRequest(models.Model):
         
     def __str__(self):
         status = "Accepted" if self.accepted else "Pending"
-        return f"{self.from_user.username} -> {self.to_user.username} ({status})"
\ No newline at end of file
+        return f"{self.from_user.username} -> {self.to_user.username} ({status})"
+
+class FeedEntry(models.Model):
+    ACTIVITY_CHOICES = [
+        ('gig', 'Gig'),
+        ('review', 'Review'),
+    ]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="feed_entries"
+    )
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="+"
+    )
+    activity_type = models.CharField(max_length=10, choices=ACTIVITY_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('user', 'activity_type', 'object_id')
+        indexes = [
+            models.Index(
+                fields=['user', '-created_at', '-activity_type', '-object_id'],
+                name='feed_user_position_idx',
+            ),
+            models.Index(
+                fields=['user', 'activity_type', '-created_at', '-object_id'],
+                name='feed_user_type_position_idx',
+            ),
+            models.Index(fields=['activity_type', 'object_id'], name='feed_activity_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} <- {self.activity_type}:{self.object_id}"
+
+
+class FollowSuggestion(models.Model):
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="follow_suggestions"
+    )
+    candidate = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="+"
+    )
+    score = models.FloatField()
+    reasons = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('user', 'candidate')
+        indexes = [
+            models.Index(fields=['user', '-score', 'candidate'], name='suggestion_user_score_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} -> {self.candidate_id} ({self.score})"
+
+
+class FollowSuggestionQueue(models.Model):
+    """Users whose suggestions are stale and wait for refresh_follow_suggestions."""
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="+"
+    )
+    queued_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.user_id} @ {self.queued_at}"
+
+
+def follow_changes(instance, action, reverse, pk_set):
+    """
+    Normalize a ``followers`` m2m_changed event into
+    (added, [(follower_id, followed_id), ...]), or None when no edge changes.
+    A clear is reported from pre_clear, while its rows can still be read.
+    """
+    if action == "pre_clear":
+        pk_set = set(
+            (instance.following if reverse else instance.followers).values_list("id", flat=True)
+        )
+    elif action not in ("post_add", "post_remove"):
+        return None
+
+    # ``followers`` is declared on the followed user, so the forward side of the
+    # relation is (followed user -> follower ids) and the reverse is ``following``.
+    if reverse:
+        pairs = [(instance.pk, followed_id) for followed_id in pk_set]
+    else:
+        pairs = [(follower_id, instance.pk) for follower_id in pk_set]
+    return action == "post_add", pairs
+
+
+@receiver(m2m_changed, sender=CustomUser.followers.through)
+def sync_timeline_on_follow_change(sender, instance, action, reverse, pk_set, **kwargs):
+    from accounts.services import feed_cache, timeline
+
+    changes = follow_changes(instance, action, reverse, pk_set)
+    if changes is None:
+        return
+    added, pairs = changes
+
+    for follower_id, followed_id in pairs:
+        if added:
+            timeline.backfill(follower_id, followed_id)
+        else:
+            timeline.purge(follower_id, [followed_id])
+
+    feed_cache.bump({follower_id for follower_id, _ in pairs})
+
+
+@receiver(m2m_changed, sender=CustomUser.followers.through)
+def sync_follow_graph(sender, instance, action, reverse, pk_set, **kwargs):
+    from accounts.services.graph import get_graph
+
+    changes = follow_changes(instance, action, reverse, pk_set)
+    if changes is not None:
+        transaction.on_commit(lambda: get_graph().apply(*changes))
+
+
+@receiver(m2m_changed, sender=CustomUser.followers.through)
+def update_follow_counters(sender, instance, action, reverse, pk_set, **kwargs):
+    from accounts.services import counters
+
+    if action == "pre_remove":
+        # remove() reports every id it was given; only count edges that exist.
+        related = instance.following if reverse else instance.followers
+        instance._removed_follow_ids = set(related.filter(id__in=pk_set).values_list("id", flat=True))
+        return
+    if action == "post_remove":
+        pk_set = instance.__dict__.pop("_removed_follow_ids", set())
+
+    changes = follow_changes(instance, action, reverse, pk_set)
+    if changes is not None:
+        counters.adjust_follows(*changes)
+
+
+# No post_delete counterpart: notification deletes go through
+# notification_retention, which adjusts the counter itself and relies on
+# deletes staying plain DELETEs (no per-row signal).
+@receiver(post_save, sender=Notification)
+def count_unread_notification(sender, instance, created, **kwargs):
+    from accounts.services import counters
+
+    if created and not instance.is_read:
+        counters.adjust("unread_notifications_count", [instance.user_id], 1)
+
+
+@receiver(pre_delete, sender=CustomUser)
+def release_follow_counters_on_delete(sender, instance, **kwargs):
+    from accounts.services import counters
+
+    # The through rows are removed by cascade without m2m_changed.
+    counters.adjust("following_count", list(instance.followers.values_list("id", flat=True)), -1)
+    counters.adjust("followers_count", list(instance.following.values_list("id", flat=True)), -1)
+
+
+@receiver(m2m_changed, sender=CustomUser.followers.through)
+def queue_suggestions_on_follow_change(sender, instance, action, reverse, pk_set, **kwargs):
+    from accounts.services import suggestion_cache, suggestions
+
+    changes = follow_changes(instance, action, reverse, pk_set)
+    if changes is None:
+        return
+    pairs = changes[1]
+
+    def on_commit():
+        suggestions.mark_neighborhood_stale(pairs)
+        suggestion_cache.bump({user_id for pair in pairs for user_id in pair})
+
+    transaction.on_commit(on_commit)
+
+
+@receiver(m2m_changed, sender=CustomUser.blocks.through)
+def invalidate_block_sets(sender, instance, action, reverse, pk_set, **kwargs):
+    from accounts.services import block_cache
+
+    if action == "pre_clear":
+        related = instance.blocked_by if reverse else instance.blocks
+        instance._cleared_block_ids = set(related.values_list("id", flat=True))
+        return
+    if action == "post_clear":
+        pk_set = instance.__dict__.pop("_cleared_block_ids", set())
+    elif action not in ("post_add", "post_remove"):
+        return
+    block_cache.bump({instance.pk, *pk_set})
+
+
+@receiver(m2m_changed, sender=CustomUser.blocks.through)
+def queue_suggestions_on_block_change(sender, instance, action, pk_set, **kwargs):
+    from accounts.services import suggestion_cache, suggestions
+
+    if action in ("post_add", "post_remove"):
+        suggestions.mark_stale({instance.pk, *pk_set})
+        suggestion_cache.bump({instance.pk, *pk_set})
+
+
+@receiver(m2m_changed, sender=CustomUser.blocks.through)
+def sync_timeline_on_block_change(sender, instance, action, pk_set, **kwargs):
+    from accounts.services import feed_cache, timeline
+
+    if action not in ("post_add", "post_remove"):
+        return
+
+    if action == "post_add":
+        for other_id in pk_set:
+            timeline.purge_pair(instance.pk, other_id)
+
+    feed_cache.bump({instance.pk, *pk_set})
+
+
+SEARCH_FIELDS = {"username", "bio", "city"}
+
+
+@receiver(post_save, sender=CustomUser)
+def update_search_vector_on_save(sender, instance, created, update_fields, **kwargs):
+    from accounts.services.search_index import update_search_vector
+
+    # Counter / last_login saves pass update_fields and don't touch the document.
+    if update_fields is not None and not SEARCH_FIELDS.intersection(update_fields):
+        return
+    update_search_vector([instance.pk])
+
+
+@receiver(m2m_changed, sender=CustomUser.skills.through)
+def update_search_vector_on_skills_change(sender, instance, action, reverse, pk_set, **kwargs):
+    from accounts.services.search_index import update_search_vector
+
+    if reverse and action == "pre_clear":
+        # Tag.users.clear(): remember who loses the tag before the rows go away.
+        instance._cleared_user_ids = list(instance.users.values_list("id", flat=True))
+        return
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    if not reverse:
+        update_search_vector([instance.pk])
+    elif action == "post_clear":
+        update_search_vector(getattr(instance, "_cleared_user_ids", []))
+    else:
+        update_search_vector(list(pk_set))
+
+
+@receiver(m2m_changed, sender=CustomUser.skills.through)
+def queue_suggestions_on_skills_change(sender, instance, action, reverse, pk_set, **kwargs):
+    from accounts.services import suggestion_cache, suggestions
+
+    if action not in ("post_add", "post_remove"):
+        return
+    user_ids = pk_set if reverse else [instance.pk]
+    suggestions.mark_stale(user_ids)
+    suggestion_cache.bump(user_ids)
@@ -0,0 +1,162 @@
+import base64
+from datetime import datetime
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import ParseError
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset pagination over ``ordering``, newest first. ``ordering`` lists
+    descending fields that together identify a row, e.g.
+    ``("-created_at", "-id")``.
+
+    Each page reads page_size + 1 rows starting right after the cursor, so
+    deep pages cost the same as the first one (no OFFSET, no COUNT).
+    ?cursor=<cursor> continues to older rows; ?after=<cursor> is the delta
+    mode: only rows newer than the cursor, oldest first, so a client that is
+    more than one page behind can keep following ``next``.
+
+    ``paginate_union`` pages through a UNION ALL of ``values()`` querysets
+    instead (cursor mode only); rows are then dicts.
+    """
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 50
+    cursor_query_param = "cursor"
+    after_query_param = "after"
+    ordering = ()
+
+    @property
+    def fields(self):
+        return [field.lstrip("-") for field in self.ordering]
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size,
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    # ------------------------------------------------------------
+    #  Cursors
+    # ------------------------------------------------------------
+
+    def encode_cursor(self, row):
+        values = (row[field] if isinstance(row, dict) else getattr(row, field) for field in self.fields)
+        raw = "|".join(value.isoformat() if isinstance(value, datetime) else str(value) for value in values)
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, cursor, model):
+        try:
+            parts = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+            if len(parts) != len(self.fields):
+                raise ValueError(cursor)
+            return [self._to_python(model, field, part) for field, part in zip(self.fields, parts)]
+        except (ValueError, UnicodeDecodeError, ValidationError):
+            raise ParseError("Invalid cursor.")
+
+    def _to_python(self, model, field, value):
+        try:
+            return model._meta.get_field(field).to_python(value)
+        except FieldDoesNotExist:
+            # An annotation such as the feed's ``activity_type`` label.
+            return value
+
+    def _beyond(self, values, lookup):
+        condition = Q()
+        for i, field in enumerate(self.fields):
+            ties = dict(zip(self.fields[:i], values[:i]))
+            condition |= Q(**ties, **{f"{field}__{lookup}": values[i]})
+        return condition
+
+    def older_than(self, values):
+        """Rows that come after this position in the newest-first ordering."""
+        return self._beyond(values, "lt")
+
+    def newer_than(self, values):
+        """Rows that come before this position in the newest-first ordering."""
+        return self._beyond(values, "gt")
+
+    # ------------------------------------------------------------
+    #  Paging
+    # ------------------------------------------------------------
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+
+        after = request.query_params.get(self.after_query_param)
+        if after:
+            queryset = queryset.filter(self.newer_than(self.decode_cursor(after, queryset.model)))
+            queryset = queryset.order_by(*self.fields)
+            self.next_param = self.after_query_param
+        else:
+            cursor = request.query_params.get(self.cursor_query_param)
+            if cursor:
+                queryset = queryset.filter(self.older_than(self.decode_cursor(cursor, queryset.model)))
+            queryset = queryset.order_by(*self.ordering)
+            self.next_param = self.cursor_query_param
+
+        rows = self._cut(list(queryset[:page_size + 1]), page_size)
+
+        if after:
+            self.newest_cursor = self.encode_cursor(rows[-1]) if rows else after
+            rows.reverse()
+        else:
+            self.newest_cursor = self.encode_cursor(rows[0]) if rows else cursor
+        return rows
+
+    def paginate_union(self, querysets, request, view=None):
+        """
+        Page through the UNION ALL of ``querysets``, ``values()`` querysets
+        that all select the ``ordering`` fields. Each branch is cut to
+        page_size + 1 rows before the union, so a page never sorts more than
+        that many rows per branch, however large the branches are.
+        """
+        self.request = request
+        page_size = self.get_page_size(request)
+        cursor = request.query_params.get(self.cursor_query_param)
+        self.next_param = self.cursor_query_param
+
+        branches = []
+        for queryset in querysets:
+            if cursor:
+                queryset = queryset.filter(self.older_than(self.decode_cursor(cursor, queryset.model)))
+            branches.append(queryset.order_by(*self.ordering)[:page_size + 1])
+
+        if len(branches) == 1:
+            rows = list(branches[0])
+        else:
+            union = branches[0].union(*branches[1:], all=True)
+            rows = list(union.order_by(*self.ordering)[:page_size + 1])
+        rows = self._cut(rows, page_size)
+        self.newest_cursor = self.encode_cursor(rows[0]) if rows else cursor
+        return rows
+
+    def _cut(self, rows, page_size):
+        self.has_next = len(rows) > page_size
+        rows = rows[:page_size]
+        self.next_cursor = self.encode_cursor(rows[-1]) if self.has_next else None
+        return rows
+
+    def get_next_link(self):
+        if not self.next_cursor:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.next_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "next_cursor": self.next_cursor,
+            "newest_cursor": self.newest_cursor,
+            "results": data,
+        })
@@ -1,7 +1,8 @@
 from rest_framework import serializers
-from .models import CustomUser, Notification, FollowRequest
+from .models import CustomUser, Notification
 from gigs.models import Tag, Gig
 from reviews.models import Review
+from accounts.services import relationships
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -73,7 +74,7 @@ class UserSerializer(serializers.ModelSerializer):
 class NotificationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Notification
-        fields = ['id', 'message', 'created_at', 'is_read']
+        fields = ['id', 'message', 'created_at', 'is_read', 'actor_count', 'sample_actor_ids']
         
 
 
@@ -107,9 +108,7 @@ class PublicProfileSerializer(serializers.ModelSerializer):
     recent_joined_gigs = serializers.SerializerMethodField()
     followers = serializers.SerializerMethodField()
     following = serializers.SerializerMethodField()
-    reviews_received = serializers.SerializerMethodField()
-    followers_count = serializers.SerializerMethodField()
-    following_count = serializers.SerializerMethodField()
+    reviews_received = serializers.IntegerField(source='total_reviews', read_only=True)
     is_following = serializers.SerializerMethodField()
     is_followed_by= serializers.SerializerMethodField()
     is_mutual = serializers.SerializerMethodField()
@@ -142,6 +141,8 @@ class PublicProfileSerializer(serializers.ModelSerializer):
             'following',
             'followers_count',
             'following_count',
+            'organized_gigs_count',
+            'joined_gigs_count',
             'is_following',
             'is_followed_by',
             'is_mutual',
@@ -150,33 +151,25 @@ class PublicProfileSerializer(serializers.ModelSerializer):
             'is_blocked'
         ]
         
-    def get_is_blocked(self, obj):
+    def get_relationship(self, obj):
+        # Resolved once per profile (the view may pass it in) instead of one query per field.
         request = self.context.get("request")
-        if not request or not request.user.is_authenticated:
-            return False
-        return (
-            obj in request.user.blocks.all()
-            or request.user in obj.blocks.all()
-        )
+        cache = self.context.setdefault("relationships", {})
+        if obj.id not in cache:
+            cache[obj.id] = (
+                relationships.between(request.user, obj) if request else relationships.empty()
+            )
+        return cache[obj.id]
+
+    def get_is_blocked(self, obj):
+        return self.get_relationship(obj)["is_blocked"]
 
-    def get_followers_count(self, obj):
-        return obj.followers.count()
-    
-    def get_following_count(self, obj):
-        return obj.following.count()
-    
     
     def get_is_followed_by(self, obj):
-        request = self.context.get('request')
-        if not request or not request.user.is_authenticated:
-            return False
-        return request.user.followers.filter(id=obj.id).exists()
+        return self.get_relationship(obj)["is_followed_by"]
     
     def get_is_mutual(self, obj):
-        return(
-            self.get_is_following(obj)
-            and self.get_is_followed_by(obj)
-        )
+        return self.get_relationship(obj)["is_mutual"]
         
     def get_is_owner(self, obj):
         request = self.context.get('request')
@@ -232,32 +225,12 @@ class PublicProfileSerializer(serializers.ModelSerializer):
         if obj.profile_image:
             return obj.profile_image.url
         return None
-    def get_reviews_received(self, obj):
-        return Review.objects.filter(reviewed_user=obj).count()
     
     def get_is_following(self, obj):
-        request = self.context.get('request')
-        if not request or not request.user.is_authenticated:
-            return False
-        return obj in request.user.following.all()
+        return self.get_relationship(obj)["is_following"]
     
     def get_follow_status(self, obj):
-        request = self.context.get("request")
-        if not request or not request.user.is_authenticated:
-            return "none"
-        
-        user = request.user
-        
-        if obj.followers.filter(id=user.id).exists():
-            return "accepted"
-        
-        if FollowRequest.objects.filter(from_user=user, to_user=obj, accepted=False).exists():
-            return "pending"
-        
-        if FollowRequest.objects.filter(from_user=obj, to_user=user, accepted=False).exists():
-            return "incoming"
-        
-        return "none"
+        return self.get_relationship(obj)["follow_status"]
     
 class ActivityItemSerializer(serializers.Serializer):
     type = serializers.ChoiceField(choices=["gig", "review"])
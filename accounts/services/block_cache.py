@@ -0,0 +1,78 @@
+"""
+Per-user block sets, cached.
+
+Listing endpoints hide users in both block directions: people the viewer
+blocked and people who blocked the viewer. Both directions are read from
+the blocks table in a single query and cached as two packed ``array('q')``
+buffers, 8 bytes per id. Keys embed a per-user version (``cache_versions``).
+Any change to the blocks relation bumps the version of both users involved
+(see ``invalidate_block_sets`` in ``accounts.models``).
+Entries also expire after ``BLOCK_SET_TIMEOUT``, bounding how long a lost bump
+can leak into listings. Access checks (profile views, follow requests) don't
+use the cached sets: they call ``pair``, which reads the table.
+"""
+
+from array import array
+
+from django.core.cache import cache
+from django.db.models import Q
+
+from accounts.models import CustomUser
+from accounts.services import cache_versions
+
+
+BLOCK_SET_TIMEOUT = 60 * 5
+
+Blocks = CustomUser.blocks.through
+
+
+def bump(user_ids):
+    """Invalidate the cached block sets of every user in ``user_ids``."""
+    cache_versions.bump("block", user_ids)
+
+
+def _load(user_id):
+    blocking, blocked_by = array("q"), array("q")
+    rows = Blocks.objects.filter(
+        Q(from_customuser_id=user_id) | Q(to_customuser_id=user_id)
+    ).values_list("from_customuser_id", "to_customuser_id")
+    for blocker_id, blocked_id in rows:
+        if blocker_id == user_id:
+            blocking.append(blocked_id)
+        if blocked_id == user_id:
+            blocked_by.append(blocker_id)
+    return blocking, blocked_by
+
+
+def pair(user_id, other_id):
+    """(``user_id`` blocks ``other_id``, ``other_id`` blocks ``user_id``), from the database."""
+    blockers = set(
+        Blocks.objects.filter(
+            Q(from_customuser_id=user_id, to_customuser_id=other_id)
+            | Q(from_customuser_id=other_id, to_customuser_id=user_id)
+        ).values_list("from_customuser_id", flat=True)
+    )
+    return user_id in blockers, other_id in blockers
+
+
+def directions(user_id):
+    """(ids ``user_id`` blocks, ids that block ``user_id``) as frozensets."""
+    version = cache_versions.get("block", user_id)
+    key = f"block_set:{user_id}:{version}"
+    cached = cache.get(key)
+    if cached is None:
+        blocking, blocked_by = _load(user_id)
+        cache.set(key, (blocking.tobytes(), blocked_by.tobytes()), timeout=BLOCK_SET_TIMEOUT)
+    else:
+        blocking, blocked_by = array("q"), array("q")
+        blocking.frombytes(cached[0])
+        blocked_by.frombytes(cached[1])
+    return frozenset(blocking), frozenset(blocked_by)
+
+
+def excluded_ids(user):
+    """Everyone hidden from ``user`` in either direction; empty for anonymous users."""
+    if not user.is_authenticated:
+        return frozenset()
+    blocking, blocked_by = directions(user.id)
+    return blocking | blocked_by
@@ -0,0 +1,98 @@
+"""
+Denormalized per-user counters.
+
+``followers_count``, ``following_count``, ``organized_gigs_count``,
+``joined_gigs_count`` and ``unread_notifications_count`` are stored on
+``CustomUser`` so that profile views and the notification badge don't run
+a COUNT(*) per request, the same way ``rating`` and
+``total_reviews`` are kept on the row. Signals in ``accounts.models`` and
+``gigs.models`` adjust them in place with F() expressions. ``reconcile``
+recomputes them from the source tables and repairs drift.
+"""
+
+from collections import Counter, defaultdict
+
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from accounts.models import CustomUser, Follow, Notification
+from gigs.models import Gig
+
+
+Musicians = Gig.musicians.through
+
+# counter field -> (rows counted, column holding the counted user's id)
+COUNTERS = {
+    "followers_count": (Follow.objects.all(), "followee_id"),
+    "following_count": (Follow.objects.all(), "follower_id"),
+    "organized_gigs_count": (Gig.objects.all(), "organizer_id"),
+    "joined_gigs_count": (Musicians.objects.all(), "customuser_id"),
+    "unread_notifications_count": (Notification.objects.filter(is_read=False), "user_id"),
+}
+
+
+def adjust(field, user_ids, delta):
+    """
+    Add ``delta`` to ``field`` once per occurrence of each id in
+    ``user_ids``. Ids that repeat are folded into one UPDATE per distinct
+    multiplicity.
+    """
+    by_step = defaultdict(list)
+    for user_id, n in Counter(user_ids).items():
+        by_step[n * delta].append(user_id)
+
+    for step, ids in by_step.items():
+        CustomUser.objects.filter(id__in=ids).update(
+            **{field: Greatest(F(field) + step, Value(0))}
+        )
+
+
+def adjust_follows(added, pairs):
+    """Apply (follower_id, followed_id) edges added or removed."""
+    if not pairs:
+        return
+    delta = 1 if added else -1
+    adjust("following_count", [follower_id for follower_id, _ in pairs], delta)
+    adjust("followers_count", [followed_id for _, followed_id in pairs], delta)
+
+
+def actual_count(field):
+    rows, column = COUNTERS[field]
+    counted = (
+        rows.filter(**{column: OuterRef("pk")})
+        .order_by()
+        .values(column)
+        .annotate(c=Count("*"))
+        .values("c")
+    )
+    return Coalesce(Subquery(counted, output_field=IntegerField()), 0)
+
+
+def reconcile(batch_size=1000):
+    """Rewrite every counter that disagrees with its source table. Returns the number of users fixed."""
+    fields = list(COUNTERS)
+    user_ids = list(CustomUser.objects.order_by("id").values_list("id", flat=True))
+    fixed = 0
+
+    for start in range(0, len(user_ids), batch_size):
+        rows = (
+            CustomUser.objects.filter(id__in=user_ids[start:start + batch_size])
+            .annotate(**{f"actual_{field}": actual_count(field) for field in fields})
+            .only("id", *fields)
+        )
+        stale = []
+        for user in rows:
+            changed = False
+            for field in fields:
+                actual = getattr(user, f"actual_{field}")
+                if getattr(user, field) != actual:
+                    setattr(user, field, actual)
+                    changed = True
+            if changed:
+                stale.append(user)
+
+        if stale:
+            CustomUser.objects.bulk_update(stale, fields)
+            fixed += len(stale)
+
+    return fixed
@@ -0,0 +1,60 @@
+"""
+Per-user feed page cache with versioned keys.
+
+Cached pages are stored under a key that embeds the user's "feed" version
+(``cache_versions``), so bumping it invalidates every cached page for that
+user at once without having to find or delete them.
+The ETag is built from the user's newest timeline entry, feed version and
+query, so it can be checked before the page is built. Cached pages are
+stored with theirs, and a repeat or conditional request for a cached page
+doesn't touch the database.
+"""
+
+import hashlib
+
+from django.core.cache import cache
+from django.utils.http import urlencode
+
+from accounts.services import cache_versions
+
+
+FEED_CACHE_TIMEOUT = 60
+
+
+def bump(user_ids):
+    """Invalidate the cached feed pages of every user in ``user_ids``."""
+    cache_versions.bump("feed", user_ids)
+
+
+def bump_audience(actor_id):
+    """Invalidate the feeds that show ``actor_id``'s activity."""
+    from accounts.services.timeline import audience_ids
+
+    bump(audience_ids(actor_id))
+
+
+def _params_digest(query_params):
+    params = urlencode(sorted(query_params.items()))
+    return hashlib.md5(params.encode()).hexdigest()
+
+
+def _page_key(user_id, query_params):
+    version = cache_versions.get("feed", user_id)
+    return f"feed_page:{user_id}:{version}:{_params_digest(query_params)}"
+
+
+def etag(user_id, query_params, newest):
+    """Strong ETag for a feed response: newest entry ``(created_at, id)`` + feed version + query."""
+    newest = "%s:%s" % (newest[0].isoformat(), newest[1]) if newest else "-"
+    version = cache_versions.get("feed", user_id)
+    raw = f"{user_id}:{version}:{newest}:{_params_digest(query_params)}"
+    return '"%s"' % hashlib.md5(raw.encode()).hexdigest()
+
+
+def get_page(user_id, query_params):
+    """(etag, data) of the cached page, or None."""
+    return cache.get(_page_key(user_id, query_params))
+
+
+def set_page(user_id, query_params, etag, data):
+    cache.set(_page_key(user_id, query_params), (etag, data), timeout=FEED_CACHE_TIMEOUT)
@@ -0,0 +1,82 @@
+"""
+Distance helpers shared by user search and follow suggestions.
+"""
+
+import math
+
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import ACos, Cos, Greatest, Least, Radians, Sin
+
+
+EARTH_RADIUS_KM = 6371
+
+
+def distance_km(lat1, lon1, lat2, lon2):
+    """Spherical-law-of-cosines distance between two points, in km."""
+    lat1, lon1 = math.radians(lat1), math.radians(lon1)
+    lat2, lon2 = math.radians(lat2), math.radians(lon2)
+
+    cos_angle = (
+        math.cos(lat1) * math.cos(lat2) * math.cos(lon2 - lon1)
+        + math.sin(lat1) * math.sin(lat2)
+    )
+    return EARTH_RADIUS_KM * math.acos(max(-1.0, min(1.0, cos_angle)))
+
+
+def distance_km_expression(lat, lon, lat_field="latitude", lon_field="longitude"):
+    """
+    The same distance as a database expression from a fixed point to each
+    row's coordinates. The cosine is clamped so rounding can't push ACOS
+    outside its domain.
+    """
+    lat, lon = math.radians(lat), math.radians(lon)
+    cos_angle = (
+        Value(math.cos(lat)) * Cos(Radians(F(lat_field))) * Cos(Radians(F(lon_field)) - Value(lon))
+        + Value(math.sin(lat)) * Sin(Radians(F(lat_field)))
+    )
+    clamped = Least(Value(1.0), Greatest(Value(-1.0), cos_angle))
+    return Value(float(EARTH_RADIUS_KM)) * ACos(clamped, output_field=FloatField())
+
+
+def bounding_box(lat, lon, radius_km):
+    """
+    Latitude / longitude ranges that contain every point within ``radius_km``.
+    Returns (min_lat, max_lat, lon_ranges); lon_ranges has two entries when
+    the box crosses the antimeridian and is empty when it covers a pole.
+    """
+    lat_delta = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat, max_lat = lat - lat_delta, lat + lat_delta
+
+    if min_lat <= -90 or max_lat >= 90:
+        return max(min_lat, -90.0), min(max_lat, 90.0), []
+
+    lon_delta = math.degrees(radius_km / (EARTH_RADIUS_KM * math.cos(math.radians(lat))))
+    if lon_delta >= 180:
+        return min_lat, max_lat, []
+
+    min_lon, max_lon = lon - lon_delta, lon + lon_delta
+    if min_lon < -180:
+        return min_lat, max_lat, [(min_lon + 360, 180.0), (-180.0, max_lon)]
+    if max_lon > 180:
+        return min_lat, max_lat, [(min_lon, 180.0), (-180.0, max_lon - 360)]
+    return min_lat, max_lat, [(min_lon, max_lon)]
+
+
+def within_radius(qs, lat, lon, radius_km):
+    """
+    Rows of ``qs`` within ``radius_km`` of (lat, lon), annotated with
+    ``distance_km``. The bounding box predicate is served by the
+    (latitude, longitude) index, so the exact distance is only computed for
+    nearby rows.
+    """
+    min_lat, max_lat, lon_ranges = bounding_box(lat, lon, radius_km)
+    qs = qs.filter(latitude__gte=min_lat, latitude__lte=max_lat, longitude__isnull=False)
+
+    if lon_ranges:
+        lon_filter = Q()
+        for min_lon, max_lon in lon_ranges:
+            lon_filter |= Q(longitude__gte=min_lon, longitude__lte=max_lon)
+        qs = qs.filter(lon_filter)
+
+    return qs.annotate(distance_km=distance_km_expression(lat, lon)).filter(distance_km__lte=radius_km)
+
@@ -0,0 +1,302 @@
+"""
+In-memory follow-graph snapshot.
+
+The ``Follow`` table is loaded into two CSR (compressed
+sparse row) structures, one per direction, held in flat ``array('q')``
+buffers: ``nodes`` (sorted user ids), ``offsets`` and ``neighbors`` (sorted
+per row). Neighbor lookups are a bisect plus a slice, so mutual-follower,
+friends-of-friends and degree questions never touch the database.
+
+The snapshot is kept current from ``m2m_changed`` events on
+``CustomUser.followers`` (see ``accounts.models.sync_follow_graph``). Changes
+are recorded in small per-user overlays until they outgrow
+``MAX_PENDING_CHANGES``, and then the CSR arrays are rebuilt.
+
+Other processes announce their changes by bumping a version in the cache
+(shared when ``CACHE_URL`` points at Redis). A process that sees a version
+it did not produce reloads its snapshot, at most once every
+``MAX_STALENESS_SECONDS``. The version check can't catch everything (a
+per-process cache never sees other processes' bumps), so every snapshot is
+also reloaded once it is ``MAX_SNAPSHOT_AGE_SECONDS`` old.
+
+Only the first load happens inside a request. Later reloads run in a
+background thread while requests keep reading the current snapshot and its
+overlay. Changes recorded meanwhile are replayed onto the new snapshot
+before it is swapped in.
+"""
+
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import connection
+
+from accounts.models import Follow
+
+
+MAX_PENDING_CHANGES = 10000
+MAX_STALENESS_SECONDS = 30
+MAX_SNAPSHOT_AGE_SECONDS = 300
+VERSION_KEY = "follow_graph_version"
+
+
+class CSR:
+    """Adjacency lists for a set of users, stored as three flat arrays."""
+
+    __slots__ = ("nodes", "offsets", "neighbors")
+
+    def __init__(self, edges):
+        # ``edges`` is a list of (node, neighbor) pairs.
+        edges.sort()
+        self.nodes = array("q")
+        self.offsets = array("q", [0])
+        self.neighbors = array("q")
+
+        for node, neighbor in edges:
+            if not self.nodes or self.nodes[-1] != node:
+                if self.nodes:
+                    self.offsets.append(len(self.neighbors))
+                self.nodes.append(node)
+            self.neighbors.append(neighbor)
+        if self.nodes:
+            self.offsets.append(len(self.neighbors))
+
+    def row(self, node):
+        i = bisect_left(self.nodes, node)
+        if i == len(self.nodes) or self.nodes[i] != node:
+            return self.neighbors[0:0]
+        return self.neighbors[self.offsets[i]:self.offsets[i + 1]]
+
+    def contains(self, node, neighbor):
+        row = self.row(node)
+        j = bisect_left(row, neighbor)
+        return j < len(row) and row[j] == neighbor
+
+    def degree(self, node):
+        i = bisect_left(self.nodes, node)
+        if i == len(self.nodes) or self.nodes[i] != node:
+            return 0
+        return self.offsets[i + 1] - self.offsets[i]
+
+    def nbytes(self):
+        return sum(a.itemsize * len(a) for a in (self.nodes, self.offsets, self.neighbors))
+
+
+class FollowGraph:
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._version = None
+        self._checked_at = 0.0
+        self._loaded_at = 0.0
+        self._refresher = None
+        # Changes applied while a load is reading the table, as
+        # (new_version, added, pairs); None when no load is running.
+        self._replay = None
+
+    # ------------------------------------------------------------
+    #  Loading / staleness
+    # ------------------------------------------------------------
+
+    def _read_edges(self):
+        return list(Follow.objects.values_list("follower_id", "followee_id"))
+
+    def load(self):
+        """Read the ``Follow`` table and swap in a new snapshot."""
+        cache.add(VERSION_KEY, 0, timeout=None)
+        version = cache.get(VERSION_KEY)
+        with self._lock:
+            self._replay = []
+        try:
+            edges = self._read_edges()
+        except BaseException:
+            with self._lock:
+                self._replay = None
+            raise
+
+        with self._lock:
+            replay, self._replay = self._replay, None
+            self._build(edges)
+            for new_version, added, pairs in replay:
+                self._record_pairs(added, pairs)
+                # Our own changes follow the version read above; anything
+                # else means another process changed the graph meanwhile.
+                version = new_version if version is not None and new_version == version + 1 else None
+            self._version = version
+            self._checked_at = self._loaded_at = time.monotonic()
+            self._loaded = True
+
+    def _load_in_background(self):
+        try:
+            self.load()
+        finally:
+            # The thread's own database connection.
+            connection.close()
+            with self._lock:
+                self._refresher = None
+
+    def _refresh(self):
+        if self._refresher is None:
+            self._refresher = threading.Thread(
+                target=self._load_in_background, name="follow-graph-refresh", daemon=True
+            )
+            self._refresher.start()
+
+    def _build(self, edges):
+        # Edges are (follower_id, followed_id).
+        self.following = CSR(list(edges))
+        self.followers = CSR([(followed, follower) for follower, followed in edges])
+        self._added = {}
+        self._removed = {}
+        self._pending = 0
+
+    def _all_edges(self):
+        edges = set()
+        for i, follower in enumerate(self.following.nodes):
+            for followed in self.following.neighbors[self.following.offsets[i]:self.following.offsets[i + 1]]:
+                edges.add((follower, followed))
+        for (direction, node), neighbors in self._removed.items():
+            if direction == "following":
+                edges.difference_update((node, n) for n in neighbors)
+        for (direction, node), neighbors in self._added.items():
+            if direction == "following":
+                edges.update((node, n) for n in neighbors)
+        return list(edges)
+
+    def _ensure_fresh(self):
+        if not self._loaded:
+            # Nothing to serve yet: the first load runs in the request.
+            self.load()
+            return
+        if self._refresher is not None:
+            return
+        now = time.monotonic()
+        if now - self._loaded_at >= MAX_SNAPSHOT_AGE_SECONDS:
+            self._refresh()
+            return
+        if now - self._checked_at < MAX_STALENESS_SECONDS:
+            return
+        self._checked_at = now
+        if cache.get(VERSION_KEY) != self._version:
+            self._refresh()
+
+    # ------------------------------------------------------------
+    #  Incremental updates
+    # ------------------------------------------------------------
+
+    def apply(self, added, pairs):
+        """Record follow edges (follower_id, followed_id) added or removed."""
+        if not pairs:
+            return
+
+        try:
+            new_version = cache.incr(VERSION_KEY)
+        except ValueError:
+            cache.add(VERSION_KEY, 0, timeout=None)
+            new_version = cache.incr(VERSION_KEY)
+
+        with self._lock:
+            if self._replay is not None:
+                self._replay.append((new_version, added, pairs))
+            if not self._loaded:
+                return
+            self._record_pairs(added, pairs)
+            if self._version is None or new_version != self._version + 1:
+                # Someone else changed the graph since our last sync: keep
+                # serving this snapshot and reload it in the background.
+                self._checked_at = 0.0
+                self._version = None
+            else:
+                self._version = new_version
+
+            if self._pending > MAX_PENDING_CHANGES:
+                self._build(self._all_edges())
+
+    def _record_pairs(self, added, pairs):
+        for follower_id, followed_id in pairs:
+            self._record(added, "following", follower_id, followed_id)
+            self._record(added, "followers", followed_id, follower_id)
+        self._pending += len(pairs)
+
+    def _record(self, added, direction, node, neighbor):
+        key = (direction, node)
+        grow, shrink = (self._added, self._removed) if added else (self._removed, self._added)
+        if neighbor in shrink.get(key, ()):
+            shrink[key].discard(neighbor)
+        else:
+            grow.setdefault(key, set()).add(neighbor)
+
+    # ------------------------------------------------------------
+    #  Queries
+    # ------------------------------------------------------------
+
+    def _neighbors(self, direction, node):
+        base = getattr(self, direction).row(node)
+        removed = self._removed.get((direction, node))
+        added = self._added.get((direction, node))
+        if not removed and not added:
+            return set(base)
+        return (set(base) - (removed or set())) | (added or set())
+
+    def followers_of(self, user_id):
+        with self._lock:
+            self._ensure_fresh()
+            return self._neighbors("followers", user_id)
+
+    def following_of(self, user_id):
+        with self._lock:
+            self._ensure_fresh()
+            return self._neighbors("following", user_id)
+
+    def is_following(self, follower_id, followed_id):
+        with self._lock:
+            self._ensure_fresh()
+            key = ("following", follower_id)
+            if followed_id in self._added.get(key, ()):
+                return True
+            if followed_id in self._removed.get(key, ()):
+                return False
+            return self.following.contains(follower_id, followed_id)
+
+    def degree(self, user_id):
+        """(followers_count, following_count)."""
+        return len(self.followers_of(user_id)), len(self.following_of(user_id))
+
+    def mutual_followers(self, user_id, other_id):
+        """Users who follow both ``user_id`` and ``other_id``."""
+        with self._lock:
+            self._ensure_fresh()
+            return self._neighbors("followers", user_id) & self._neighbors("followers", other_id)
+
+    def friends_of_friends(self, user_id, exclude=()):
+        """
+        Counter of users followed by the people ``user_id`` follows, keyed by
+        candidate id, excluding ``user_id``, people already followed and
+        ``exclude``.
+        """
+        with self._lock:
+            self._ensure_fresh()
+            following = self._neighbors("following", user_id)
+            counts = Counter()
+            for followed_id in following:
+                counts.update(self._neighbors("following", followed_id))
+
+        for skip in (user_id, *following, *exclude):
+            counts.pop(skip, None)
+        return counts
+
+    def nbytes(self):
+        with self._lock:
+            self._ensure_fresh()
+            return self.followers.nbytes() + self.following.nbytes()
+
+
+_graph = FollowGraph()
+
+
+def get_graph():
+    return _graph
@@ -0,0 +1,84 @@
+"""
+Notification retention.
+
+Two rules keep the notifications table down to hot data:
+
+- read notifications older than ``NOTIFICATION_READ_RETENTION_DAYS`` are
+  dropped
+- at most ``NOTIFICATION_KEEP_PER_USER`` notifications are kept per user,
+  newest first; anything older goes, read or not
+
+Rows are deleted in id chunks with plain DELETEs. There is no post_delete
+receiver on ``Notification``, so Django doesn't load each row before
+deleting it. Unread rows removed by the per-user cap are subtracted from
+``unread_notifications_count`` here.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from accounts.models import Notification
+from accounts.services import counters
+
+
+DELETE_CHUNK_SIZE = 5000
+
+
+def keep_per_user():
+    return getattr(settings, "NOTIFICATION_KEEP_PER_USER", 500)
+
+
+def read_cutoff(now=None):
+    days = getattr(settings, "NOTIFICATION_READ_RETENTION_DAYS", 90)
+    return (now or timezone.now()) - timedelta(days=days)
+
+
+def prune_read(user_ids, cutoff):
+    """Drop read notifications of ``user_ids`` created before ``cutoff``."""
+    stale = Notification.objects.filter(user_id__in=user_ids, is_read=True, created_at__lt=cutoff)
+    deleted = 0
+    while True:
+        ids = list(stale.values_list("id", flat=True)[:DELETE_CHUNK_SIZE])
+        if not ids:
+            return deleted
+        deleted += Notification.objects.filter(id__in=ids).delete()[0]
+
+
+def prune_overflow(user_id, keep):
+    """Drop everything but the newest ``keep`` notifications of ``user_id``."""
+    mine = Notification.objects.filter(user_id=user_id)
+    boundary = mine.order_by("-created_at", "-id").values_list("created_at", "id")[keep - 1:keep].first()
+    if boundary is None:
+        return 0
+
+    created_at, notification_id = boundary
+    older = mine.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=notification_id))
+    deleted = 0
+    while True:
+        rows = list(older.values_list("id", "is_read")[:DELETE_CHUNK_SIZE])
+        if not rows:
+            return deleted
+        deleted += Notification.objects.filter(id__in=[pk for pk, _ in rows]).delete()[0]
+        unread = sum(1 for _, is_read in rows if not is_read)
+        if unread:
+            counters.adjust("unread_notifications_count", [user_id], -unread)
+
+
+def prune(user_ids, keep=None, cutoff=None):
+    """Apply both retention rules to ``user_ids``. Returns the number of rows deleted."""
+    keep = keep or keep_per_user()
+    deleted = prune_read(user_ids, cutoff or read_cutoff())
+
+    over_cap = (
+        Notification.objects.filter(user_id__in=user_ids)
+        .values("user_id")
+        .annotate(n=Count("id"))
+        .filter(n__gt=keep)
+        .values_list("user_id", flat=True)
+    )
+    for user_id in over_cap:
+        deleted += prune_overflow(user_id, keep)
+    return deleted
@@ -0,0 +1,155 @@
+"""
+Live notification fan-out for the Server-Sent Events stream.
+
+``publish`` is called by ``notify.drain`` as notifications are written.
+The payloads travel through a pluggable backend to every ASGI process.
+There, a single ``Hub`` per process hands each payload to the open streams
+of its recipient. An idle stream costs one small bounded ``asyncio.Queue``
+and the suspended response generator. There is no thread and no database
+connection per client.
+
+Backends (``NOTIFICATION_STREAM_BACKEND``, a dotted path):
+
+- ``PostgresBackend`` (default) uses ``pg_notify`` / ``LISTEN``, because the
+  ``process_notifications`` worker runs in its own process. Notifications
+  raised inside a transaction are only delivered once it commits. Each ASGI
+  process holds one listening connection, watched with ``loop.add_reader``.
+- ``LocalBackend`` dispatches in-process, for single-process setups such as
+  ``runserver`` with the worker started in the same process.
+"""
+
+import asyncio
+import json
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.utils.module_loading import import_string
+
+
+CHANNEL = "tuneup_notifications"
+QUEUE_SIZE = 100
+
+
+def payload(notification):
+    return {
+        "id": notification.id,
+        "user_id": notification.user_id,
+        "message": notification.message,
+        "created_at": notification.created_at.isoformat() if notification.created_at else None,
+        "is_read": notification.is_read,
+        "actor_count": notification.actor_count,
+        "sample_actor_ids": notification.sample_actor_ids,
+    }
+
+
+# ============================================================
+#  HUB (per process)
+# ============================================================
+
+class Hub:
+    def __init__(self, backend):
+        self.backend = backend
+        self.loop = None
+        self.streams = {}
+
+    async def subscribe(self, user_id):
+        if self.loop is None:
+            self.loop = asyncio.get_running_loop()
+            await self.backend.start(self)
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.streams.setdefault(user_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, user_id, queue):
+        queues = self.streams.get(user_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self.streams[user_id]
+
+    def dispatch(self, message):
+        """Hand one payload to the recipient's streams; runs on the hub's loop."""
+        for queue in self.streams.get(message["user_id"], ()):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # A stalled client misses live items and catches up through
+                # Last-Event-ID or the list endpoint when it reconnects.
+                pass
+
+
+# ============================================================
+#  BACKENDS
+# ============================================================
+
+class LocalBackend:
+    def __init__(self):
+        self.hub = None
+
+    async def start(self, hub):
+        self.hub = hub
+
+    def publish(self, messages):
+        if self.hub is None or self.hub.loop is None:
+            return
+
+        def deliver():
+            for message in messages:
+                self.hub.loop.call_soon_threadsafe(self.hub.dispatch, message)
+
+        transaction.on_commit(deliver)
+
+
+class PostgresBackend:
+    def __init__(self):
+        self.listener = None
+
+    async def start(self, hub):
+        import psycopg2
+
+        params = connections["default"].get_connection_params()
+        self.listener = await asyncio.to_thread(psycopg2.connect, **params)
+        self.listener.autocommit = True
+        with self.listener.cursor() as cursor:
+            cursor.execute(f"LISTEN {CHANNEL}")
+
+        def ready():
+            try:
+                self.listener.poll()
+            except psycopg2.OperationalError:
+                # Lost the listening connection: the next subscriber reconnects.
+                hub.loop.remove_reader(self.listener.fileno())
+                hub.loop = None
+                return
+            while self.listener.notifies:
+                hub.dispatch(json.loads(self.listener.notifies.pop(0).payload))
+
+        hub.loop.add_reader(self.listener.fileno(), ready)
+
+    def publish(self, messages):
+        if not messages:
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_notify(%s, message) FROM unnest(%s::text[]) AS message",
+                [CHANNEL, [json.dumps(message) for message in messages]],
+            )
+
+
+_hub = None
+
+
+def get_hub():
+    global _hub
+    if _hub is None:
+        backend = getattr(
+            settings, "NOTIFICATION_STREAM_BACKEND", "accounts.services.notification_stream.PostgresBackend"
+        )
+        _hub = Hub(import_string(backend)())
+    return _hub
+
+
+def publish(notifications):
+    """Push freshly created ``notifications`` to their recipients' open streams."""
+    get_hub().backend.publish([payload(notification) for notification in notifications])
@@ -0,0 +1,154 @@
+"""
+Queued notification dispatch.
+
+Views don't insert ``Notification`` rows themselves. They call ``notify`` or
+``notify_followers``, which only append a ``NotificationEvent`` to a
+database-backed queue. The ``process_notifications`` worker calls ``drain``.
+It claims a batch of events with ``SELECT ... FOR UPDATE SKIP LOCKED``, so
+several workers can run side by side. It expands follower fan-out events,
+writes the notifications with ``bulk_create``, publishes them to open
+notification streams (``notification_stream``) and bumps the unread counters
+with one UPDATE per distinct increment.
+
+Events queued with a ``group`` coalesce. All events with the same group and
+time bucket (``GROUP_WINDOW_SECONDS``) share one notification per recipient.
+That row is updated in place: its actor count goes up, the newest actors
+lead ``sample_actor_ids``, and the message switches to ``grouped_message``
+once a second actor joins. The row also moves back to the top of the list
+and becomes unread again.
+"""
+
+import time
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from accounts.models import Follow, Notification, NotificationEvent
+from accounts.services import counters, notification_stream
+
+
+DRAIN_BATCH_SIZE = 500
+INSERT_BATCH_SIZE = 1000
+GROUP_WINDOW_SECONDS = 60 * 60 * 24
+SAMPLE_ACTORS = 5
+
+
+def group_key(group, now=None):
+    """``group`` plus the time bucket it falls in, e.g. ``gig_application:42:20379``."""
+    bucket = int((now or time.time()) // GROUP_WINDOW_SECONDS)
+    return f"{group}:{bucket}"
+
+
+def notify(user, message, actor=None, group=None, grouped_message=""):
+    """
+    Queue ``message`` for ``user``. With ``group`` (e.g. ``f"gig_application:{gig.id}"``)
+    it is merged into the recipient's notification for that group, reading
+    ``grouped_message`` with ``{count}`` filled in once several actors are involved.
+    """
+    NotificationEvent.objects.create(
+        kind=NotificationEvent.DIRECT,
+        recipient=user,
+        actor=actor,
+        message=message,
+        group_key=group_key(group) if group else "",
+        grouped_message=grouped_message,
+    )
+
+
+def notify_followers(actor, message):
+    """Queue ``message`` for every follower of ``actor``; expanded by the worker."""
+    NotificationEvent.objects.create(kind=NotificationEvent.FOLLOWERS, actor=actor, message=message)
+
+
+def _recipients(event):
+    if event.kind == NotificationEvent.DIRECT:
+        return [event.recipient_id]
+    return Follow.objects.filter(followee_id=event.actor_id).values_list("follower_id", flat=True).iterator()
+
+
+def _add_actor(notification, event):
+    sample = notification.sample_actor_ids
+    if event.actor_id is not None and event.actor_id in sample:
+        # Repeat actor (e.g. a re-sent follow request): counted once.
+        return
+    notification.actor_count += 1
+    if event.actor_id is not None:
+        notification.sample_actor_ids = [event.actor_id, *sample][:SAMPLE_ACTORS]
+    if notification.actor_count > 1 and event.grouped_message:
+        notification.message = event.grouped_message.replace("{count}", str(notification.actor_count))[:225]
+    else:
+        notification.message = event.message
+
+
+def _coalesce(grouped, unread):
+    """Fold grouped events into one row per (recipient, group_key). Returns the rows touched."""
+    existing = {
+        (notification.user_id, notification.group_key): notification
+        for notification in Notification.objects.select_for_update().filter(
+            user_id__in={user_id for user_id, _ in grouped},
+            group_key__in={key for _, key in grouped},
+        )
+    }
+    now = timezone.now()
+    created, updated = [], []
+    for (user_id, key), events in grouped.items():
+        notification = existing.get((user_id, key))
+        if notification is None:
+            notification = Notification(user_id=user_id, group_key=key, actor_count=0, sample_actor_ids=[])
+            created.append(notification)
+            unread[user_id] += 1
+        else:
+            updated.append(notification)
+            if notification.is_read:
+                notification.is_read = False
+                unread[user_id] += 1
+        for event in events:
+            _add_actor(notification, event)
+        notification.created_at = now
+
+    Notification.objects.bulk_create(created)
+    Notification.objects.bulk_update(
+        updated, ["message", "actor_count", "sample_actor_ids", "is_read", "created_at"]
+    )
+    return created + updated
+
+
+def drain(batch_size=DRAIN_BATCH_SIZE):
+    """Deliver one batch of queued events. Returns the number of events handled."""
+    try:
+        with transaction.atomic():
+            events = list(
+                NotificationEvent.objects.select_for_update(skip_locked=True).order_by("id")[:batch_size]
+            )
+            if not events:
+                return 0
+
+            unread = Counter()
+            pending = []
+            grouped = {}
+            for event in events:
+                if event.group_key:
+                    grouped.setdefault((event.recipient_id, event.group_key), []).append(event)
+                    continue
+                for user_id in _recipients(event):
+                    pending.append(Notification(user_id=user_id, message=event.message))
+                    unread[user_id] += 1
+                    if len(pending) >= INSERT_BATCH_SIZE:
+                        notification_stream.publish(Notification.objects.bulk_create(pending))
+                        pending = []
+            if pending:
+                notification_stream.publish(Notification.objects.bulk_create(pending))
+            if grouped:
+                notification_stream.publish(_coalesce(grouped, unread))
+
+            # bulk_create skips post_save, so the unread counters are bumped here.
+            counters.adjust("unread_notifications_count", unread.elements(), 1)
+            NotificationEvent.objects.filter(id__in=[event.id for event in events]).delete()
+    except IntegrityError:
+        # Another worker created a group row this batch also tried to create.
+        # The batch rolled back and stays queued; the next pass merges into
+        # that row instead.
+        return 0
+
+    return len(events)
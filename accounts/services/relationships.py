@@ -0,0 +1,86 @@
+"""
+Viewer-to-user relationship state (follow, block, pending follow request).
+
+``resolve`` answers for many targets at once with two queries, one for
+follow edges and one for pending requests, however many targets there are.
+Blocks come from the cached block sets (``block_cache``), except in
+``between``, which backs access checks and reads them from the table.
+Profile pages, follow buttons and the ``relationships/`` endpoint all use it.
+"""
+
+from django.db.models import Q
+
+from accounts.models import Follow, FollowRequest
+from accounts.services import block_cache
+
+
+def empty():
+    return {
+        "is_following": False,
+        "is_followed_by": False,
+        "is_mutual": False,
+        "follow_status": "none",
+        "is_blocking": False,
+        "is_blocked_by": False,
+        "is_blocked": False,
+    }
+
+
+def resolve(viewer, target_ids):
+    """
+    Map each id in ``target_ids`` to the viewer's relationship with it:
+
+    - is_following / is_followed_by / is_mutual: follow edges either way
+    - follow_status: "accepted" (viewer follows), "pending" (viewer's request
+      is waiting), "incoming" (target's request is waiting) or "none"
+    - is_blocking / is_blocked_by, and is_blocked when either is set
+    """
+    target_ids = set(target_ids)
+    relationships = {target_id: empty() for target_id in target_ids}
+    if not target_ids or not viewer.is_authenticated:
+        return relationships
+
+    follows = Follow.objects.filter(
+        Q(follower=viewer, followee_id__in=target_ids) | Q(followee=viewer, follower_id__in=target_ids)
+    ).values_list("follower_id", "followee_id")
+    for follower_id, followee_id in follows:
+        if follower_id == viewer.id:
+            relationships[followee_id]["is_following"] = True
+        if followee_id == viewer.id:
+            relationships[follower_id]["is_followed_by"] = True
+
+    blocking, blocked_by = block_cache.directions(viewer.id)
+    for target_id in target_ids:
+        relationships[target_id]["is_blocking"] = target_id in blocking
+        relationships[target_id]["is_blocked_by"] = target_id in blocked_by
+
+    pending = FollowRequest.objects.filter(accepted=False).filter(
+        Q(from_user=viewer, to_user_id__in=target_ids) | Q(to_user=viewer, from_user_id__in=target_ids)
+    ).values_list("from_user_id", "to_user_id")
+    for from_id, to_id in pending:
+        if from_id == viewer.id:
+            relationships[to_id]["follow_status"] = "pending"
+        elif relationships[from_id]["follow_status"] == "none":
+            relationships[from_id]["follow_status"] = "incoming"
+
+    for relationship in relationships.values():
+        relationship["is_mutual"] = relationship["is_following"] and relationship["is_followed_by"]
+        relationship["is_blocked"] = relationship["is_blocking"] or relationship["is_blocked_by"]
+        if relationship["is_following"]:
+            relationship["follow_status"] = "accepted"
+
+    return relationships
+
+
+def between(viewer, target):
+    """
+    ``resolve`` for a single target. Callers gate access on the result, so
+    blocks are read from the database rather than the cached block sets.
+    """
+    relationship = resolve(viewer, [target.id])[target.id]
+    if viewer.is_authenticated:
+        blocking, blocked_by = block_cache.pair(viewer.id, target.id)
+        relationship["is_blocking"] = blocking
+        relationship["is_blocked_by"] = blocked_by
+        relationship["is_blocked"] = blocking or blocked_by
+    return relationship
@@ -0,0 +1,185 @@
+"""
+Ranking for ``UserSearchView``.
+
+Every ranking signal is a SQL annotation, so the database scores, orders and
+LIMITs the matches and only one page of users is loaded into Python.
+
+``stream_top_k`` is the streaming alternative: it reads only the scoring
+columns in chunks and keeps a bounded heap of the best ``k`` ids, so memory
+scales with the page being served rather than with the number of matches.
+"""
+
+import heapq
+from datetime import timedelta
+
+from django.contrib.postgres.search import SearchRank
+from django.db.models import (
+    Case, Count, ExpressionWrapper, F, FloatField, IntegerField, OuterRef, Subquery, Value, When,
+)
+from django.db.models.functions import Coalesce, Greatest
+
+from accounts.models import CustomUser, Follow
+from accounts.services.geo import distance_km, distance_km_expression, within_radius
+from accounts.services.search_index import prefix_query
+
+
+SHARED_SKILL_WEIGHT = 3
+MUTUAL_FOLLOWER_WEIGHT = 2
+# SearchRank is roughly 0..1; scale it to the old prefix / substring boosts.
+TEXT_RANK_WEIGHT = 10
+
+STREAM_CHUNK_SIZE = 2000
+
+Skills = CustomUser.skills.through
+
+
+def _count(qs, group_field):
+    """Correlated COUNT(*) subquery, 0 when there are no rows."""
+    counted = qs.order_by().values(group_field).annotate(c=Count("*")).values("c")
+    return Coalesce(Subquery(counted, output_field=IntegerField()), 0)
+
+
+def filter_candidates(qs, q=None, skill_id=None, city=None, country=None, near=None):
+    """
+    Apply the search filters. ``near`` is an optional (lat, lon, radius_km)
+    for the "near me" mode. Returns (queryset, tsquery or None).
+    """
+    query = None
+    if q:
+        query = prefix_query(q)
+        if query is None:
+            return qs.none(), None
+        qs = qs.filter(search_vector=query)
+    if skill_id:
+        qs = qs.filter(skills__id=skill_id)
+    if city:
+        qs = qs.filter(city__iexact=city)
+    if country:
+        qs = qs.filter(country__iexact=country)
+    if near:
+        qs = within_radius(qs, *near)
+    return qs, query
+
+
+def activity_score(now):
+    return Case(
+        When(last_login__gte=now - timedelta(days=7), then=Value(10)),
+        When(last_login__gte=now - timedelta(days=30), then=Value(5)),
+        When(last_login__gte=now - timedelta(days=60), then=Value(1)),
+        When(last_login__isnull=False, then=Value(-3)),
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def distance_score(user):
+    if not (user.latitude and user.longitude):
+        return Value(0.0)
+    distance = distance_km_expression(user.latitude, user.longitude)
+    return Case(
+        When(
+            latitude__isnull=False, longitude__isnull=False,
+            then=Greatest(Value(0.0), Value(5.0) - distance / Value(10.0)),
+        ),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+
+
+def annotate_signals(qs, user, query=None):
+    """Annotations for the signals that need other tables (or the tsvector)."""
+    user_skill_ids = list(user.skills.values_list("id", flat=True))
+    user_follower_ids = list(user.followers.values_list("id", flat=True))
+
+    return qs.annotate(
+        shared_skills=_count(
+            Skills.objects.filter(customuser_id=OuterRef("pk"), tag_id__in=user_skill_ids),
+            "customuser_id",
+        ),
+        mutual_followers=_count(
+            Follow.objects.filter(followee_id=OuterRef("pk"), follower_id__in=user_follower_ids),
+            "followee_id",
+        ),
+        text_rank=SearchRank(F("search_vector"), query) if query is not None else Value(0.0),
+    )
+
+
+def annotate_scores(qs, user, now, query=None):
+    qs = annotate_signals(qs, user, query).annotate(
+        activity=activity_score(now),
+        distance_score=distance_score(user),
+    )
+    return qs.annotate(
+        score=ExpressionWrapper(
+            F("shared_skills") * SHARED_SKILL_WEIGHT
+            + F("mutual_followers") * MUTUAL_FOLLOWER_WEIGHT
+            + F("activity")
+            + F("distance_score")
+            + F("text_rank") * TEXT_RANK_WEIGHT,
+            output_field=FloatField(),
+        )
+    )
+
+
+# ============================================================
+#  STREAMING TOP-K
+# ============================================================
+
+
+def activity_points(last_login, now):
+    """Python twin of ``activity_score``: same ``last_login >= now - N days`` bounds."""
+    if last_login is None:
+        return 0
+    if last_login >= now - timedelta(days=7):
+        return 10
+    elif last_login >= now - timedelta(days=30):
+        return 5
+    elif last_login >= now - timedelta(days=60):
+        return 1
+    return -3
+
+
+def distance_points(user, latitude, longitude):
+    """Python twin of ``distance_score``."""
+    if not (user.latitude and user.longitude) or latitude is None or longitude is None:
+        return 0.0
+    return max(0.0, 5 - distance_km(user.latitude, user.longitude, latitude, longitude) / 10)
+
+
+def top_k(scored, k):
+    """
+    Best ``k`` of an iterable of (score, user_id), ordered like the SQL path
+    (score desc, id asc), holding at most ``k`` entries at a time.
+    """
+    heap = []
+    total = 0
+    for score, user_id in scored:
+        total += 1
+        item = (score, -user_id)
+        if len(heap) < k:
+            heapq.heappush(heap, item)
+        elif item > heap[0]:
+            heapq.heapreplace(heap, item)
+    return total, [(score, -neg_id) for score, neg_id in sorted(heap, reverse=True)]
+
+
+def stream_top_k(qs, user, now, k, query=None):
+    """Returns (number of matches, [(score, user_id)] best first)."""
+    rows = (
+        annotate_signals(qs, user, query)
+        .order_by()
+        .values_list("id", "shared_skills", "mutual_followers", "text_rank", "last_login", "latitude", "longitude")
+        .iterator(chunk_size=STREAM_CHUNK_SIZE)
+    )
+    scored = (
+        (
+            shared_skills * SHARED_SKILL_WEIGHT
+            + mutual_followers * MUTUAL_FOLLOWER_WEIGHT
+            + activity_points(last_login, now)
+            + distance_points(user, latitude, longitude)
+            + text_rank * TEXT_RANK_WEIGHT,
+            user_id,
+        )
+        for user_id, shared_skills, mutual_followers, text_rank, last_login, latitude, longitude in rows
+    )
+    return top_k(scored, k)
@@ -0,0 +1,106 @@
+"""
+Normalized search result cache for ``UserSearchView``.
+
+The viewer-independent part of a search (text match, skill / city / country
+filters, activity) is computed once per normalized query and cached briefly
+as compact (id, base_score, latitude, longitude) tuples. Each viewer then
+applies a cheap overlay on top: block exclusion, shared skills, mutual
+followers and distance, followed by the bounded top-k from ``search``.
+
+Only the best ``MAX_CANDIDATES`` matches by base score are kept, so a
+candidate whose viewer-specific signals would have lifted it above that
+cut is never ranked. This mode is therefore opt-in (``?ranking=cached``).
+The true number of matches is cached alongside the candidates, so it can
+still be reported.
+"""
+
+import hashlib
+import re
+from collections import Counter
+
+from django.contrib.postgres.search import SearchRank
+from django.core.cache import cache
+from django.db.models import ExpressionWrapper, F, FloatField, Value
+
+from accounts.models import CustomUser, Follow
+from accounts.services import search
+
+
+SEARCH_CACHE_TIMEOUT = 120
+# Popular queries keep their best candidates by base score; the overlay can
+# only reorder within this set.
+MAX_CANDIDATES = 5000
+
+
+def normalized_key(q, skill_id, city, country):
+    terms = " ".join(sorted(set(re.findall(r"\w+", (q or "").lower()))))
+    raw = "|".join([terms, str(skill_id or ""), (city or "").strip().lower(), (country or "").strip().lower()])
+    return "user_search:" + hashlib.md5(raw.encode()).hexdigest()
+
+
+def get_candidates(q, skill_id, city, country, now):
+    """(number of matches, best ``MAX_CANDIDATES`` candidate rows)."""
+    key = normalized_key(q, skill_id, city, country)
+    cached = cache.get(key)
+    if cached is None:
+        cached = _compute_candidates(q, skill_id, city, country, now)
+        cache.set(key, cached, timeout=SEARCH_CACHE_TIMEOUT)
+    return cached
+
+
+def _compute_candidates(q, skill_id, city, country, now):
+    qs, query = search.filter_candidates(CustomUser.objects.all(), q, skill_id, city, country)
+    text_rank = SearchRank(F("search_vector"), query) if query is not None else Value(0.0)
+    qs = qs.annotate(
+        base_score=ExpressionWrapper(
+            search.activity_score(now) + text_rank * search.TEXT_RANK_WEIGHT,
+            output_field=FloatField(),
+        )
+    )
+    rows = qs.order_by("-base_score", "id").values_list("id", "base_score", "latitude", "longitude")
+    candidates = list(rows[:MAX_CANDIDATES])
+    matches = qs.count() if len(candidates) == MAX_CANDIDATES else len(candidates)
+    return matches, candidates
+
+
+def visible_matches(matches, candidates, excluded_ids):
+    """
+    ``matches`` minus the blocked users among the cached candidates, for the
+    response count. Exact unless the candidates were capped; then blocked
+    users past the cap are still counted, so the total is an upper bound.
+    """
+    if not excluded_ids:
+        return matches
+    return matches - sum(1 for row in candidates if row[0] in excluded_ids)
+
+
+def overlay(candidates, user, excluded_ids):
+    """Yield (score, user_id) with the viewer-specific signals added."""
+    candidate_ids = [row[0] for row in candidates if row[0] not in excluded_ids]
+    user_skill_ids = list(user.skills.values_list("id", flat=True))
+    user_follower_ids = list(user.followers.values_list("id", flat=True))
+
+    shared_skills = Counter()
+    if user_skill_ids and candidate_ids:
+        shared_skills.update(
+            search.Skills.objects.filter(customuser_id__in=candidate_ids, tag_id__in=user_skill_ids)
+            .values_list("customuser_id", flat=True)
+        )
+
+    mutual_followers = Counter()
+    if user_follower_ids and candidate_ids:
+        mutual_followers.update(
+            Follow.objects.filter(followee_id__in=candidate_ids, follower_id__in=user_follower_ids)
+            .values_list("followee_id", flat=True)
+        )
+
+    for user_id, base_score, latitude, longitude in candidates:
+        if user_id in excluded_ids:
+            continue
+        yield (
+            base_score
+            + shared_skills[user_id] * search.SHARED_SKILL_WEIGHT
+            + mutual_followers[user_id] * search.MUTUAL_FOLLOWER_WEIGHT
+            + search.distance_points(user, latitude, longitude),
+            user_id,
+        )
@@ -0,0 +1,55 @@
+"""
+Maintenance of ``CustomUser.search_vector``, the PostgreSQL full-text document
+used by ``UserSearchView``.
+
+The vector covers username (weight A), skill names (B), bio (B) and city (C).
+It uses the ``simple`` configuration so usernames and instrument names are
+matched as typed rather than stemmed.
+"""
+
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchVector
+from django.db.models import Value
+
+from accounts.models import CustomUser
+
+
+SEARCH_CONFIG = "simple"
+
+
+def build_vector(skill_names):
+    return (
+        SearchVector("username", weight="A", config=SEARCH_CONFIG)
+        + SearchVector(Value(" ".join(skill_names)), weight="B", config=SEARCH_CONFIG)
+        + SearchVector("bio", weight="B", config=SEARCH_CONFIG)
+        + SearchVector("city", weight="C", config=SEARCH_CONFIG)
+    )
+
+
+def update_search_vector(user_ids):
+    from gigs.models import Tag
+
+    skills = {}
+    for user_id, name in Tag.objects.filter(users__in=user_ids).values_list("users", "name"):
+        skills.setdefault(user_id, []).append(name)
+
+    for user_id in user_ids:
+        CustomUser.objects.filter(pk=user_id).update(
+            search_vector=build_vector(sorted(skills.get(user_id, [])))
+        )
+
+
+def prefix_query(q):
+    """
+    Turn free text into a prefix tsquery ("gui jaz" -> gui:* & jaz:*), so
+    partially typed words still match. Returns None if nothing is searchable.
+    """
+    terms = re.findall(r"\w+", q.lower())
+    if not terms:
+        return None
+    return SearchQuery(
+        " & ".join(f"{term}:*" for term in terms),
+        search_type="raw",
+        config=SEARCH_CONFIG,
+    )
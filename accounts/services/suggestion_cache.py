@@ -0,0 +1,77 @@
+"""
+Response cache for the follow suggestion endpoints.
+
+Entries are stored as envelopes ``{"data": ..., "fresh_until": ts}``. An
+entry is kept in the cache ``STALE_SECONDS`` longer than it is fresh:
+
+- A fresh entry is returned as is. Empty results are cached too, for
+  ``EMPTY_FRESH_SECONDS``, so users without suggestions don't recompute on
+  every call.
+- When the entry is stale or missing, one request wins a ``cache.add`` lock
+  and recomputes. Concurrent requests meanwhile get the stale entry, or
+  briefly wait for the winner when there is nothing to serve.
+
+Keys embed a per-user version (``cache_versions``). Follows, unfollows,
+blocks and skill changes bump the version (see the suggestion receivers in
+``accounts.models``), and so does a refresh of the precomputed table.
+"""
+
+import time
+
+from django.core.cache import cache
+
+from accounts.services import cache_versions
+
+
+FRESH_SECONDS = 600
+EMPTY_FRESH_SECONDS = 120
+STALE_SECONDS = 3600
+LOCK_TIMEOUT = 30
+LOCK_WAIT_SECONDS = 2.0
+LOCK_POLL_SECONDS = 0.05
+
+
+def bump(user_ids):
+    """Invalidate the cached suggestions of every user in ``user_ids``."""
+    cache_versions.bump("suggestions", user_ids)
+
+
+def _store(key, data):
+    fresh = FRESH_SECONDS if data.get("results") else EMPTY_FRESH_SECONDS
+    envelope = {"data": data, "fresh_until": time.time() + fresh}
+    cache.set(key, envelope, timeout=fresh + STALE_SECONDS)
+
+
+def get_or_compute(kind, user_id, compute):
+    """
+    Return the cached response for ``kind`` ("basic" / "advanced"). It is
+    recomputed with ``compute()`` when stale, but only by one caller at a time.
+    """
+    version = cache_versions.get("suggestions", user_id)
+    key = f"suggestions:{kind}:{user_id}:{version}"
+    envelope = cache.get(key)
+    if envelope is not None and envelope["fresh_until"] > time.time():
+        return envelope["data"]
+
+    lock_key = f"{key}:lock"
+    if cache.add(lock_key, 1, timeout=LOCK_TIMEOUT):
+        try:
+            data = compute()
+            _store(key, data)
+        finally:
+            cache.delete(lock_key)
+        return data
+
+    if envelope is not None:
+        # Someone else is revalidating; serve the stale copy meanwhile.
+        return envelope["data"]
+
+    deadline = time.monotonic() + LOCK_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_SECONDS)
+        envelope = cache.get(key)
+        if envelope is not None:
+            return envelope["data"]
+
+    # The lock holder is slow or died; compute without caching.
+    return compute()
@@ -0,0 +1,89 @@
+"""
+Vectorized scoring for ``AdvancedFollowSuggestionsView``.
+
+Candidate features are read with ``values_list`` into one NumPy column each.
+The weighted score is then computed for all candidates at once, and
+``argpartition`` picks the top ``k`` without sorting the whole array.
+"""
+
+import math
+
+import numpy as np
+
+from accounts.services.geo import EARTH_RADIUS_KM
+
+
+MUTUAL_FOLLOWER_WEIGHT = 4
+FOLLOWED_BY_FOLLOWING_WEIGHT = 3
+SHARED_SKILL_WEIGHT = 2
+SAME_CITY_WEIGHT = 2
+TRENDING_WEIGHT = 1
+DISTANCE_WEIGHT = 1
+
+FEATURES = (
+    "id",
+    "mutual_followers",
+    "followed_by_following",
+    "shared_skills",
+    "same_city",
+    "trending",
+    "latitude",
+    "longitude",
+)
+
+
+def columns(rows):
+    """
+    Turn ``FEATURES`` tuples into a dict of arrays, converted as one 2-D
+    float array. Missing coordinates become NaN.
+    """
+    matrix = np.array(list(rows), dtype=np.float64).reshape(-1, len(FEATURES))
+    features = {name: matrix[:, i] for i, name in enumerate(FEATURES)}
+    features["id"] = features["id"].astype(np.int64)
+    return features
+
+
+def distance_points(lat, lon, lats, lons):
+    """
+    ``max(0, 10 - km / 10)`` per candidate. The score is 0 when either side
+    has no coordinates.
+    """
+    if not (lat and lon):
+        return np.zeros(len(lats))
+
+    lat, lon = math.radians(lat), math.radians(lon)
+    lats_r, lons_r = np.radians(lats), np.radians(lons)
+    cos_angle = (
+        math.cos(lat) * np.cos(lats_r) * np.cos(lons_r - lon)
+        + math.sin(lat) * np.sin(lats_r)
+    )
+    km = EARTH_RADIUS_KM * np.arccos(np.clip(cos_angle, -1.0, 1.0))
+
+    # Zero counts as missing, matching the truthiness check on the user.
+    has_coords = np.nan_to_num(lats) != 0
+    has_coords &= np.nan_to_num(lons) != 0
+    return np.where(has_coords, np.maximum(0.0, 10 - km / 10), 0.0)
+
+
+def score(features, lat, lon, rng=None):
+    """Weighted score per candidate, plus a random boost in [0, 1) for freshness."""
+    rng = rng or np.random.default_rng()
+    return (
+        features["mutual_followers"] * MUTUAL_FOLLOWER_WEIGHT
+        + features["followed_by_following"] * FOLLOWED_BY_FOLLOWING_WEIGHT
+        + features["shared_skills"] * SHARED_SKILL_WEIGHT
+        + features["same_city"] * SAME_CITY_WEIGHT
+        + features["trending"] * TRENDING_WEIGHT
+        + distance_points(lat, lon, features["latitude"], features["longitude"]) * DISTANCE_WEIGHT
+        + rng.random(len(features["id"]))
+    )
+
+
+def top_k(ids, scores, k):
+    """The ``k`` best (id, score) pairs, best first."""
+    if len(scores) > k:
+        best = np.argpartition(-scores, k - 1)[:k]
+    else:
+        best = np.arange(len(scores))
+    best = best[np.argsort(-scores[best], kind="stable")]
+    return [(int(ids[i]), float(scores[i])) for i in best]
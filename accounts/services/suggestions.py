@@ -0,0 +1,199 @@
+"""
+Precomputed follow suggestions.
+
+``FollowSuggestion`` holds the best ``MAX_SUGGESTIONS`` candidates per user,
+so ``FollowSuggestionsView`` only reads a ``(user, -score)`` index range.
+Rows are written by the ``refresh_follow_suggestions`` command. Candidates
+come from the in-memory follow graph (friends of friends, and people followed
+by the user's followers), then people who share skills, then people in the
+same city.
+
+Follow, block and skill changes put the affected users on
+``FollowSuggestionQueue``. The command refreshes only those users unless it
+is run with ``--all``.
+"""
+
+import heapq
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from accounts.models import CustomUser, FollowSuggestion, FollowSuggestionQueue
+from accounts.services import suggestion_cache
+from accounts.services.graph import get_graph
+
+
+MAX_SUGGESTIONS = 50
+SKILL_CANDIDATES = 200
+# Neighbors queued per side when a follow edge changes; --all covers the rest.
+MAX_STALE_NEIGHBORS = 1000
+
+MUTUAL_FOLLOWER_WEIGHT = 4
+FOLLOWED_BY_FOLLOWING_WEIGHT = 3
+SHARED_SKILL_WEIGHT = 2
+SAME_CITY_WEIGHT = 2
+
+Skills = CustomUser.skills.through
+Blocks = CustomUser.blocks.through
+
+
+# ------------------------------------------------------------
+#  Scoring
+# ------------------------------------------------------------
+
+def score(reasons):
+    return (
+        reasons["mutual_followers"] * MUTUAL_FOLLOWER_WEIGHT
+        + reasons["followed_by_following"] * FOLLOWED_BY_FOLLOWING_WEIGHT
+        + reasons["shared_skills"] * SHARED_SKILL_WEIGHT
+        + reasons["same_city"] * SAME_CITY_WEIGHT
+    )
+
+
+def _blocked_ids(user_ids):
+    blocked = defaultdict(set)
+    rows = Blocks.objects.filter(
+        Q(from_customuser_id__in=user_ids) | Q(to_customuser_id__in=user_ids)
+    ).values_list("from_customuser_id", "to_customuser_id")
+    for blocker_id, blocked_id in rows:
+        blocked[blocker_id].add(blocked_id)
+        blocked[blocked_id].add(blocker_id)
+    return blocked
+
+
+def _shared_skills(user_id, exclude):
+    tag_ids = Skills.objects.filter(customuser_id=user_id).values("tag_id")
+    rows = (
+        Skills.objects.filter(tag_id__in=tag_ids)
+        .exclude(customuser_id__in=exclude)
+        .values("customuser_id")
+        .annotate(n=Count("*"))
+        .order_by("-n", "customuser_id")
+        .values_list("customuser_id", "n")[:SKILL_CANDIDATES]
+    )
+    return dict(rows)
+
+
+def compute(user_ids):
+    """
+    Return ``(user_id, candidate_id, score, reasons)`` rows for each user in
+    ``user_ids``. At most ``MAX_SUGGESTIONS`` rows are returned per user.
+    """
+    graph = get_graph()
+    cities = dict(CustomUser.objects.filter(id__in=user_ids).values_list("id", "city"))
+    blocked = _blocked_ids(user_ids)
+    rows = []
+
+    for user_id in user_ids:
+        if user_id not in cities:
+            continue
+        exclude = {user_id, *graph.following_of(user_id), *blocked[user_id]}
+
+        followed_by_following = graph.friends_of_friends(user_id, exclude=exclude)
+        mutual = Counter()
+        for follower_id in graph.followers_of(user_id):
+            mutual.update(graph.following_of(follower_id))
+        for skip in exclude:
+            mutual.pop(skip, None)
+        shared = _shared_skills(user_id, exclude)
+
+        city = cities[user_id]
+        candidates = set(followed_by_following) | set(mutual) | set(shared)
+        candidate_cities = dict(
+            CustomUser.objects.filter(id__in=candidates).values_list("id", "city")
+        ) if city else {}
+
+        if city and len(candidates) < MAX_SUGGESTIONS:
+            nearby = (
+                CustomUser.objects.filter(city=city)
+                .exclude(id__in=exclude | candidates)
+                .order_by("username")
+                .values_list("id", flat=True)[:MAX_SUGGESTIONS - len(candidates)]
+            )
+            for candidate_id in nearby:
+                candidates.add(candidate_id)
+                candidate_cities[candidate_id] = city
+
+        scored = []
+        for candidate_id in candidates:
+            reasons = {
+                "mutual_followers": mutual.get(candidate_id, 0),
+                "followed_by_following": followed_by_following.get(candidate_id, 0),
+                "shared_skills": shared.get(candidate_id, 0),
+                "same_city": bool(city) and candidate_cities.get(candidate_id) == city,
+            }
+            scored.append((score(reasons), candidate_id, reasons))
+
+        best = heapq.nsmallest(MAX_SUGGESTIONS, scored, key=lambda s: (-s[0], s[1]))
+        rows.extend((user_id, candidate_id, value, reasons) for value, candidate_id, reasons in best)
+
+    return rows
+
+
+# ------------------------------------------------------------
+#  Storage
+# ------------------------------------------------------------
+
+def store(user_ids, rows, queued_before=None, invalidate=True):
+    """
+    Replace the suggestions of ``user_ids`` with ``rows``. Queue entries made
+    before ``queued_before`` are cleared. Entries added while the rows were
+    being computed stay queued.
+
+    ``invalidate=False`` leaves the cached responses alone. It is for
+    refreshes made while computing a response that is about to be cached:
+    a bump there would orphan that response's key.
+    """
+    with transaction.atomic():
+        FollowSuggestion.objects.filter(user_id__in=user_ids).delete()
+        FollowSuggestion.objects.bulk_create(
+            [
+                FollowSuggestion(user_id=user_id, candidate_id=candidate_id, score=value, reasons=reasons)
+                for user_id, candidate_id, value, reasons in rows
+            ],
+            batch_size=1000,
+        )
+        queued = FollowSuggestionQueue.objects.filter(user_id__in=user_ids)
+        if queued_before is not None:
+            queued = queued.filter(queued_at__lte=queued_before)
+        queued.delete()
+
+    if invalidate:
+        suggestion_cache.bump(user_ids)
+
+
+def refresh(user_ids, invalidate=True):
+    store(user_ids, compute(user_ids), queued_before=timezone.now(), invalidate=invalidate)
+
+
+# ------------------------------------------------------------
+#  Invalidation
+# ------------------------------------------------------------
+
+def mark_stale(user_ids):
+    now = timezone.now()
+    FollowSuggestionQueue.objects.bulk_create(
+        [FollowSuggestionQueue(user_id=user_id, queued_at=now) for user_id in set(user_ids)],
+        update_conflicts=True,
+        unique_fields=["user"],
+        update_fields=["queued_at"],
+        batch_size=1000,
+    )
+
+
+def mark_neighborhood_stale(pairs):
+    """
+    Queue everyone whose candidates change when the follow edges ``pairs``
+    (follower_id, followed_id) are added or removed. That is both endpoints,
+    the follower's followers (their friends of friends) and the people the
+    follower follows (their mutual followers).
+    """
+    graph = get_graph()
+    user_ids = set()
+    for follower_id, followed_id in pairs:
+        user_ids.update((follower_id, followed_id))
+        for neighbors in (graph.followers_of(follower_id), graph.following_of(follower_id)):
+            user_ids.update(sorted(neighbors)[:MAX_STALE_NEIGHBORS])
+    mark_stale(user_ids)
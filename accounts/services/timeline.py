@@ -0,0 +1,96 @@
+"""
+Fan-out-on-write timelines backing ``UserFeedView``.
+
+Every Gig and Review is copied into the ``FeedEntry`` rows of its author and
+the author's followers when it is written, so reading a feed page is a single
+range scan over ``(user, -created_at)``.
+"""
+
+from django.db.models import Q
+
+from accounts.models import Follow, FeedEntry
+
+
+# How much history is copied into a timeline when a new follow is created.
+BACKFILL_LIMIT = 200
+
+
+def audience_ids(actor_id):
+    follower_ids = list(
+        Follow.objects.filter(followee_id=actor_id)
+        .values_list("follower_id", flat=True)
+    )
+    follower_ids.append(actor_id)
+    return follower_ids
+
+
+def fan_out(activity_type, object_id, actor_id, created_at):
+    entries = [
+        FeedEntry(
+            user_id=user_id,
+            actor_id=actor_id,
+            activity_type=activity_type,
+            object_id=object_id,
+            created_at=created_at,
+        )
+        for user_id in audience_ids(actor_id)
+    ]
+    FeedEntry.objects.bulk_create(entries, ignore_conflicts=True, batch_size=1000)
+
+
+def fan_out_gig(gig):
+    fan_out("gig", gig.id, gig.organizer_id, gig.created_at)
+
+
+def fan_out_review(review):
+    fan_out("review", review.id, review.reviewer_id, review.created_at)
+
+
+def remove_activity(activity_type, object_id):
+    FeedEntry.objects.filter(activity_type=activity_type, object_id=object_id).delete()
+
+
+def backfill(user_id, actor_id, limit=BACKFILL_LIMIT):
+    """Copy ``actor_id``'s recent gigs and reviews into ``user_id``'s timeline."""
+    from gigs.models import Gig
+    from reviews.models import Review
+
+    gigs = (
+        Gig.objects.filter(organizer_id=actor_id)
+        .order_by("-created_at")
+        .values_list("id", "created_at")[:limit]
+    )
+    reviews = (
+        Review.objects.filter(reviewer_id=actor_id)
+        .order_by("-created_at")
+        .values_list("id", "created_at")[:limit]
+    )
+
+    entries = [
+        FeedEntry(user_id=user_id, actor_id=actor_id, activity_type="gig", object_id=pk, created_at=created_at)
+        for pk, created_at in gigs
+    ]
+    entries += [
+        FeedEntry(user_id=user_id, actor_id=actor_id, activity_type="review", object_id=pk, created_at=created_at)
+        for pk, created_at in reviews
+    ]
+    FeedEntry.objects.bulk_create(entries, ignore_conflicts=True, batch_size=1000)
+
+
+def purge(user_id, actor_ids):
+    """Drop everything authored by ``actor_ids`` from ``user_id``'s timeline."""
+    FeedEntry.objects.filter(user_id=user_id, actor_id__in=actor_ids).delete()
+
+
+def purge_pair(user_id, other_id):
+    """Remove both users' activity from each other's timelines (used on block)."""
+    FeedEntry.objects.filter(
+        Q(user_id=user_id, actor_id=other_id) | Q(user_id=other_id, actor_id=user_id)
+    ).delete()
+
+
+def rebuild(user, limit=BACKFILL_LIMIT):
+    FeedEntry.objects.filter(user=user).delete()
+    backfill(user.id, user.id, limit)
+    for actor_id in user.following.values_list("id", flat=True):
+        backfill(user.id, actor_id, limit)
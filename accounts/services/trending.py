@@ -0,0 +1,79 @@
+"""
+Stored, time-decayed hotness scores for gigs and reviews.
+
+``Gig.hotness`` and ``Review.hotness`` hold the trending scores the feed used
+to compute per request. Review writes keep the affected gig current, and the
+``refresh_trending_scores`` command re-applies the age decay periodically.
+"""
+
+from datetime import timedelta
+
+from django.db.models import Count, Q
+from django.utils import timezone
+
+
+RECENT_WINDOW = timedelta(days=30)
+
+
+def _age_days(created_at, now):
+    return max((now - created_at).days, 1)
+
+
+def gig_hotness(review_count, recent_count, created_at, now=None):
+    now = now or timezone.now()
+    return review_count * 2 + recent_count * 3 + (30 / _age_days(created_at, now))
+
+
+def review_hotness(rating, created_at, now=None):
+    now = now or timezone.now()
+    return (10 / _age_days(created_at, now)) + (rating or 0)
+
+
+def _gig_scores(gigs, now):
+    gigs = gigs.annotate(
+        review_count=Count("reviews"),
+        recent_count=Count("reviews", filter=Q(reviews__created_at__gte=now - RECENT_WINDOW)),
+    ).values_list("id", "review_count", "recent_count", "created_at")
+    return {
+        pk: gig_hotness(review_count, recent_count, created_at, now)
+        for pk, review_count, recent_count, created_at in gigs
+    }
+
+
+def refresh_gig(gig_id):
+    from gigs.models import Gig
+
+    scores = _gig_scores(Gig.objects.filter(id=gig_id), timezone.now())
+    if gig_id in scores:
+        Gig.objects.filter(id=gig_id).update(hotness=scores[gig_id])
+
+
+def decay_all(batch_size=1000):
+    """Recompute every stored score so the age terms keep decaying."""
+    from gigs.models import Gig
+    from reviews.models import Review
+
+    now = timezone.now()
+    updated = 0
+
+    gig_ids = list(Gig.objects.order_by("id").values_list("id", flat=True))
+    for start in range(0, len(gig_ids), batch_size):
+        scores = _gig_scores(Gig.objects.filter(id__in=gig_ids[start:start + batch_size]), now)
+        Gig.objects.bulk_update(
+            [Gig(id=pk, hotness=score) for pk, score in scores.items()], ["hotness"]
+        )
+        updated += len(scores)
+
+    reviews = Review.objects.order_by("id").values_list("id", "rating", "created_at")
+    batch = []
+    for pk, rating, created_at in reviews.iterator(chunk_size=batch_size):
+        batch.append(Review(id=pk, hotness=review_hotness(rating, created_at, now)))
+        if len(batch) >= batch_size:
+            Review.objects.bulk_update(batch, ["hotness"])
+            updated += len(batch)
+            batch = []
+    if batch:
+        Review.objects.bulk_update(batch, ["hotness"])
+        updated += len(batch)
+
+    return updated
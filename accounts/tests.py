@@ -1,3 +1,383 @@
-from django.test import TestCase
+import asyncio
+import base64
+import json
+import threading
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.exceptions import ParseError
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import CustomUser, FeedEntry, Follow, Notification
+from accounts.services import graph, notification_stream, notify
+from accounts.services.graph import CSR, FollowGraph
+from accounts.views.feed_views import FeedCursorPagination
+from accounts.views.follow_views import FollowCursorPagination
+from accounts.views.notification_views import notification_stream_view, sse_event
+
+
+LOCMEM = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+class CSRTests(SimpleTestCase):
+    def setUp(self):
+        self.csr = CSR([(3, 1), (1, 5), (1, 2), (3, 9), (7, 1)])
+
+    def test_rows_are_sorted_per_node(self):
+        self.assertEqual(list(self.csr.nodes), [1, 3, 7])
+        self.assertEqual(list(self.csr.row(1)), [2, 5])
+        self.assertEqual(list(self.csr.row(3)), [1, 9])
+        self.assertEqual(list(self.csr.row(7)), [1])
+
+    def test_missing_node(self):
+        self.assertEqual(list(self.csr.row(4)), [])
+        self.assertEqual(list(self.csr.row(100)), [])
+        self.assertEqual(self.csr.degree(4), 0)
+        self.assertFalse(self.csr.contains(4, 1))
+
+    def test_contains_and_degree(self):
+        self.assertTrue(self.csr.contains(1, 5))
+        self.assertFalse(self.csr.contains(1, 3))
+        self.assertEqual(self.csr.degree(1), 2)
+        self.assertEqual(self.csr.degree(7), 1)
+
+    def test_empty(self):
+        csr = CSR([])
+        self.assertEqual(list(csr.row(1)), [])
+        self.assertEqual(csr.degree(1), 0)
+        self.assertEqual(csr.nbytes(), 8)
+
+
+@override_settings(CACHES=LOCMEM)
+class FollowGraphOverlayTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        # (follower_id, followed_id): what the Follow table holds.
+        self.edges = [(1, 2), (1, 3), (2, 3), (3, 1), (4, 3)]
+        self.graph = FollowGraph()
+        read = mock.patch.object(FollowGraph, "_read_edges", autospec=True, side_effect=self.read_edges)
+        self.read = read.start()
+        self.addCleanup(read.stop)
+
+    def read_edges(self, graph_self):
+        return list(self.edges)
+
+    def wait_for_refresh(self):
+        refresher = self.graph._refresher
+        if refresher is not None:
+            refresher.join(5)
+            self.assertFalse(refresher.is_alive())
+
+    def test_snapshot_queries(self):
+        self.assertEqual(self.graph.followers_of(3), {1, 2, 4})
+        self.assertEqual(self.graph.following_of(1), {2, 3})
+        self.assertTrue(self.graph.is_following(3, 1))
+        self.assertFalse(self.graph.is_following(1, 4))
+        self.assertEqual(self.graph.degree(3), (3, 1))
+        self.assertEqual(self.graph.mutual_followers(2, 3), {1})
+        self.assertEqual(self.graph.friends_of_friends(2), {1: 1})
+
+    def test_overlay_add_and_remove(self):
+        self.graph.followers_of(1)
+        self.graph.apply(True, [(2, 1)])
+        self.graph.apply(False, [(1, 3)])
+
+        self.assertEqual(self.graph.followers_of(1), {2, 3})
+        self.assertEqual(self.graph.followers_of(3), {2, 4})
+        self.assertTrue(self.graph.is_following(2, 1))
+        self.assertFalse(self.graph.is_following(1, 3))
+        self.assertEqual(self.read.call_count, 1)
+
+    def test_remove_then_add_cancels_out(self):
+        self.graph.followers_of(1)
+        self.graph.apply(False, [(1, 2)])
+        self.graph.apply(True, [(1, 2)])
+
+        self.assertTrue(self.graph.is_following(1, 2))
+        self.assertEqual(self.graph.following_of(1), {2, 3})
+        self.assertFalse(any(self.graph._added.values()))
+        self.assertFalse(any(self.graph._removed.values()))
+
+    def test_all_edges_merges_overlay(self):
+        self.graph.followers_of(1)
+        self.graph.apply(True, [(4, 1), (2, 1)])
+        self.graph.apply(False, [(1, 3), (4, 3)])
+
+        expected = {(1, 2), (2, 3), (3, 1), (4, 1), (2, 1)}
+        self.assertEqual(set(self.graph._all_edges()), expected)
+
+    def test_rebuild_after_too_many_pending_changes(self):
+        self.graph.followers_of(1)
+        with mock.patch.object(graph, "MAX_PENDING_CHANGES", 2):
+            self.graph.apply(True, [(4, 1)])
+            self.graph.apply(True, [(4, 2), (2, 1)])
+
+        self.assertEqual(self.graph._pending, 0)
+        self.assertEqual(self.graph._added, {})
+        self.assertEqual(list(self.graph.following.row(4)), [1, 2, 3])
+        self.assertEqual(self.graph.followers_of(1), {2, 3, 4})
+
+    def test_version_skew_triggers_background_reload(self):
+        self.graph.followers_of(1)
+        # Another process recorded a change we never saw.
+        self.edges.append((4, 2))
+        cache.incr(graph.VERSION_KEY)
+
+        self.graph.apply(True, [(2, 1)])
+        self.edges.append((2, 1))
+        self.assertIsNone(self.graph._version)
+        # Our own change is served right away, from the old snapshot.
+        self.assertEqual(self.graph.followers_of(1), {2, 3})
+
+        self.wait_for_refresh()
+        self.assertEqual(self.read.call_count, 2)
+        self.assertEqual(self.graph.followers_of(2), {1, 4})
+        self.assertEqual(self.graph._version, cache.get(graph.VERSION_KEY))
+
+    def test_foreign_version_seen_after_staleness_window(self):
+        self.graph.followers_of(1)
+        cache.incr(graph.VERSION_KEY)
+
+        self.graph.followers_of(1)
+        self.assertEqual(self.read.call_count, 1)
+
+        self.graph._checked_at -= graph.MAX_STALENESS_SECONDS
+        self.graph.followers_of(1)
+        self.wait_for_refresh()
+        self.assertEqual(self.read.call_count, 2)
+
+    def test_old_snapshot_served_while_rebuilding(self):
+        self.graph.followers_of(1)
+        self.graph._loaded_at -= graph.MAX_SNAPSHOT_AGE_SECONDS
+
+        reading, release = threading.Event(), threading.Event()
+
+        def slow_read(graph_self):
+            edges = list(self.edges)
+            reading.set()
+            release.wait(5)
+            return edges
+
+        self.read.side_effect = slow_read
+        self.assertEqual(self.graph.followers_of(1), {3})
+        self.assertTrue(reading.wait(5))
+
+        # Requests keep answering from the old snapshot, and a change made
+        # after the rebuild read the table survives the swap.
+        self.assertEqual(self.graph.followers_of(3), {1, 2, 4})
+        self.graph.apply(True, [(4, 1)])
+        self.assertEqual(self.graph.followers_of(1), {3, 4})
+
+        release.set()
+        self.wait_for_refresh()
+        self.assertEqual(self.read.call_count, 2)
+        self.assertEqual(self.graph.followers_of(1), {3, 4})
+        self.assertEqual(self.graph._version, cache.get(graph.VERSION_KEY))
+        self.assertIsNone(self.graph._replay)
+
+    def test_apply_before_load_only_bumps_version(self):
+        self.graph.apply(True, [(2, 1)])
+        self.assertEqual(cache.get(graph.VERSION_KEY), 1)
+        self.assertEqual(self.read.call_count, 0)
+
+
+@override_settings(CACHES=LOCMEM)
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user("reader", "reader@example.com", "pw")
+        self.actor = CustomUser.objects.create_user("writer", "writer@example.com", "pw")
+        self.now = timezone.now()
+        # Seven entries sharing one created_at: only (activity_type,
+        # object_id) tells them apart.
+        for activity_type, object_id in [("gig", 1), ("review", 1), ("gig", 2), ("review", 2),
+                                         ("gig", 3), ("review", 3), ("gig", 4)]:
+            self.add_entry(activity_type, object_id, self.now)
+
+    def add_entry(self, activity_type, object_id, created_at):
+        FeedEntry.objects.create(
+            user=self.user, actor=self.actor, activity_type=activity_type,
+            object_id=object_id, created_at=created_at,
+        )
+
+    def paginate(self, paginator, queryset, **params):
+        request = Request(APIRequestFactory().get("/", params))
+        rows = paginator.paginate_queryset(queryset, request)
+        return [(row.activity_type, row.object_id) for row in rows]
+
+    def walk(self, param, cursor, page_size):
+        seen = []
+        while cursor:
+            paginator = FeedCursorPagination()
+            seen.append(self.paginate(
+                paginator, FeedEntry.objects.filter(user=self.user), **{param: cursor, "page_size": page_size}
+            ))
+            cursor = paginator.next_cursor
+        return seen, paginator
+
+    def test_pages_split_rows_with_equal_created_at(self):
+        paginator = FeedCursorPagination()
+        first = self.paginate(paginator, FeedEntry.objects.filter(user=self.user), cursor="", page_size=3)
+        rest, _ = self.walk("cursor", paginator.next_cursor, 3)
+
+        expected = sorted(FeedEntry.objects.values_list("activity_type", "object_id"), reverse=True)
+        self.assertEqual([first, *rest], [expected[0:3], expected[3:6], expected[6:7]])
+
+    def test_malformed_cursor(self):
+        paginator = FeedCursorPagination()
+        for raw in [b"\xff", b"2026-01-01T00:00:00+00:00|gig", b"yesterday|gig|1", b"2026-01-01T00:00:00+00:00|gig|x"]:
+            with self.assertRaises(ParseError):
+                paginator.decode_cursor(base64.urlsafe_b64encode(raw).decode(), FeedEntry)
+        with self.assertRaises(ParseError):
+            paginator.decode_cursor("zzz", FeedEntry)
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        self.assertEqual(client.get("/accounts/feed/?cursor=zzz").status_code, 400)
+        self.assertEqual(client.get("/accounts/feed/?after=zzz").status_code, 400)
+
+    def test_delta_returns_only_newer_rows(self):
+        paginator = FeedCursorPagination()
+        self.paginate(paginator, FeedEntry.objects.filter(user=self.user), cursor="", page_size=3)
+        newest = paginator.newest_cursor
+
+        # Nothing new yet: an empty page that keeps the client's cursor.
+        pages, last = self.walk("after", newest, 2)
+        self.assertEqual(pages, [[]])
+        self.assertEqual(last.newest_cursor, newest)
+
+        for i in range(5):
+            self.add_entry("gig", 10 + i, self.now + timedelta(seconds=i + 1))
+        pages, last = self.walk("after", newest, 2)
+
+        # Oldest pages first, newest first within a page.
+        self.assertEqual(pages, [[("gig", 11), ("gig", 10)], [("gig", 13), ("gig", 12)], [("gig", 14)]])
+        self.assertEqual(last.decode_cursor(last.newest_cursor, FeedEntry)[2], 14)
+
+    def test_follow_pages_split_rows_with_equal_created_at(self):
+        followers = [
+            CustomUser.objects.create_user(f"fan{i}", f"fan{i}@example.com", "pw") for i in range(5)
+        ]
+        Follow.objects.bulk_create(Follow(followee=self.actor, follower=fan) for fan in followers)
+        Follow.objects.update(created_at=self.now)
+        edges = Follow.objects.filter(followee=self.actor)
+
+        seen, cursor = [], ""
+        while cursor is not None:
+            paginator = FollowCursorPagination()
+            request = Request(APIRequestFactory().get("/", {"cursor": cursor, "page_size": 2}))
+            seen += [edge.id for edge in paginator.paginate_queryset(edges, request)]
+            cursor = paginator.next_cursor
+
+        self.assertEqual(seen, sorted(edges.values_list("id", flat=True), reverse=True))
+
+
+GROUP = "gig_application:1"
+
+
+class NotificationCoalescingTests(TestCase):
+    def setUp(self):
+        self.owner = CustomUser.objects.create_user("owner", "owner@example.com", "pw")
+        self.applicants = [
+            CustomUser.objects.create_user(f"applicant{i}", f"applicant{i}@example.com", "pw") for i in range(7)
+        ]
+
+    def apply(self, applicant):
+        notify.notify(
+            self.owner, f"{applicant.username} applied.", actor=applicant,
+            group=GROUP, grouped_message="{count} people applied.",
+        )
+
+    def test_one_row_per_group_with_capped_sample(self):
+        self.apply(self.applicants[0])
+        notify.drain()
+        first = Notification.objects.get(user=self.owner)
+        self.assertEqual((first.actor_count, first.message), (1, "applicant0 applied."))
+
+        for applicant in self.applicants[1:]:
+            self.apply(applicant)
+        # A repeat actor is counted once.
+        self.apply(self.applicants[3])
+        notify.drain()
+
+        notification = Notification.objects.get(user=self.owner)
+        self.assertEqual(notification.id, first.id)
+        self.assertEqual(notification.actor_count, 7)
+        self.assertEqual(notification.message, "7 people applied.")
+        self.assertEqual(
+            notification.sample_actor_ids, [applicant.id for applicant in reversed(self.applicants)][:notify.SAMPLE_ACTORS]
+        )
+        self.assertGreater(notification.created_at, first.created_at)
+        self.assertEqual(CustomUser.objects.get(id=self.owner.id).unread_notifications_count, 1)
+
+
+@override_settings(NOTIFICATION_STREAM_BACKEND="accounts.services.notification_stream.LocalBackend")
+class NotificationStreamReplayTests(TestCase):
+    def setUp(self):
+        self.owner = CustomUser.objects.create_user("owner", "owner@example.com", "pw")
+        self.first, self.second = [
+            CustomUser.objects.create_user(f"applicant{i}", f"applicant{i}@example.com", "pw") for i in range(2)
+        ]
+        hub = mock.patch.object(notification_stream, "_hub", None)
+        hub.start()
+        self.addCleanup(hub.stop)
+
+    def deliver(self, *events):
+        with self.captureOnCommitCallbacks(execute=True):
+            for recipient, message, actor, group in events:
+                notify.notify(recipient, message, actor=actor, group=group, grouped_message="{count} applied.")
+            notify.drain()
+
+    async def read_events(self, stream, timeout=0.2):
+        events = []
+        while True:
+            try:
+                chunk = await asyncio.wait_for(stream.__anext__(), timeout)
+            except asyncio.TimeoutError:
+                return events
+            if chunk.startswith(b"id:"):
+                events.append(json.loads(chunk.decode().split("data: ", 1)[1]))
+
+    async def open_stream(self):
+        """Deliver one grouped and one plain notification, and connect after the plain one."""
+        await sync_to_async(self.deliver)((self.owner, "applicant0 applied.", self.first, GROUP))
+        await sync_to_async(self.deliver)((self.owner, "Welcome!", None, None))
+        self.grouped = await Notification.objects.aget(user=self.owner, group_key__startswith=GROUP)
+        latest = await Notification.objects.aget(user=self.owner, group_key="")
+        self.assertLess(self.grouped.id, latest.id)
+        last_event_id = sse_event(notification_stream.payload(latest)).split("\n", 1)[0][len("id: "):]
+
+        request = RequestFactory().get(
+            "/accounts/notifications/stream/",
+            {"token": str(AccessToken.for_user(self.owner))},
+            HTTP_LAST_EVENT_ID=last_event_id,
+        )
+        response = await notification_stream_view(request)
+        return response.streaming_content.__aiter__()
+
+    async def test_row_coalesced_while_disconnected_is_replayed_once(self):
+        # The group row grows after the client's last event but keeps its
+        # lower id; only the replay can deliver it.
+        stream = await self.open_stream()
+        await sync_to_async(self.deliver)((self.owner, "applicant1 applied.", self.second, GROUP))
+
+        self.assertEqual(await stream.__anext__(), b"retry: 5000\n\n")
+        events = await self.read_events(stream)
+        self.assertEqual([(event["id"], event["actor_count"]) for event in events], [(self.grouped.id, 2)])
+        self.assertEqual(events[0]["message"], "2 applied.")
+
+    async def test_row_coalesced_while_replaying_is_sent_once(self):
+        stream = await self.open_stream()
+        self.assertEqual(await stream.__anext__(), b"retry: 5000\n\n")
+        # Subscribed, not replayed yet: the update is both published live
+        # and found by the replay.
+        await sync_to_async(self.deliver)((self.owner, "applicant1 applied.", self.second, GROUP))
+
+        events = await self.read_events(stream)
+        self.assertEqual([(event["id"], event["actor_count"]) for event in events], [(self.grouped.id, 2)])
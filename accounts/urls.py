@@ -18,7 +18,8 @@ from accounts.views.follow_views import (
     PendingFollowRequestsView,
     CancelFollowRequestView,
     SentFollowRequestView,
-    UnfollowUserView
+    UnfollowUserView,
+    RelationshipsView,
 )
 
 from accounts.views.notification_views import (
@@ -26,6 +27,7 @@ from accounts.views.notification_views import (
     NotificationMarkReadView,
     NotificationMarkAllReadView,
     UnreadNotificationCountView,
+    notification_stream_view,
 )
 from accounts.views.block_views import (
     BlockUserView,
@@ -35,7 +37,7 @@ from accounts.views.block_views import (
 
 
 from accounts.views.feed_views import UserFeedView
-from accounts.views.search_views import UserSearchView
+from accounts.views.search_views import UserSearchView, UserAutocompleteView
 
 urlpatterns = [
     #Auth
@@ -63,6 +65,7 @@ urlpatterns = [
     path('users/<int:user_id>/cancel-follow-request/', CancelFollowRequestView.as_view(), name='cancel-follow-request'),
     path('users/follow-requests/sent/', SentFollowRequestView.as_view(), name='sent-follow-requests'),
     path('users/<int:user_id>/unfollow/', UnfollowUserView.as_view(), name="unfollow"),
+    path('relationships/', RelationshipsView.as_view(), name='relationships'),
     
     
     
@@ -71,12 +74,14 @@ urlpatterns = [
     path('notifications/<int:id>/read/', NotificationMarkReadView.as_view(), name='notification-read'),
     path('notifications/mark-all-read/', NotificationMarkAllReadView.as_view(), name='notifications-mark-all-read'),
     path('notifications/unread-count/', UnreadNotificationCountView.as_view(), name='unread-notification-count'),
+    path('notifications/stream/', notification_stream_view, name='notification-stream'),
     
     #Feed 
     path('feed/', UserFeedView.as_view(), name='user-feed'),
     
     #Search
     path('search/', UserSearchView.as_view(), name='user-search'),
+    path('search/autocomplete/', UserAutocompleteView.as_view(), name='user-autocomplete'),
     
     #Block
     path('users/<int:user_id>/block/', BlockUserView.as_view(), name='block-user'),
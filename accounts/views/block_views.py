@@ -5,8 +5,9 @@ from django.shortcuts import get_object_or_404
 from rest_framework.pagination import PageNumberPagination
 from django.db.models import Q
 
-from accounts.models import CustomUser, FollowRequest, Notification
+from accounts.models import CustomUser, FollowRequest
 from accounts.serializers import UserMiniSerializer
+from accounts.services import notify
 
 
 
@@ -32,10 +33,7 @@ class BlockUserView(APIView):
         
         request.user.blocks.add(target_user)
         
-        Notification.objects.create(
-            user=target_user,
-            message=f"{request.user.username} has blocked you."
-        )
+        notify.notify(target_user, f"{request.user.username} has blocked you.")
         
         return Response({"message":f"You blocked {target_user.username}."}, status=200)
  
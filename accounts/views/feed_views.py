@@ -1,14 +1,18 @@
-from rest_framework import permissions
+from rest_framework import permissions, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
 from django.utils import timezone
-from django.db.models import Count, Q
+from django.utils.http import parse_etags
+from django.db.models import CharField, Value
 from datetime import timedelta
 
 from gigs.models import Gig
 from reviews.models import Review
+from accounts.models import FeedEntry
+from accounts.pagination import KeysetPagination
 from accounts.serializers import ActivityItemSerializer
+from accounts.services import block_cache, feed_cache
 
 # ============================================================
 #  FEED PAGINATION
@@ -19,8 +23,95 @@ class FeedPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = "page_size"
     max_page_size = 50
+
+
+class FeedCursorPagination(KeysetPagination):
+    """Keyset pagination over timeline rows by (created_at, activity_type, object_id)."""
+    ordering = ("-created_at", "-activity_type", "-object_id")
+
+
+class TrendingCursorPagination(KeysetPagination):
+    """Keyset pagination over gig / review activity by (hotness, activity_type, id)."""
+    ordering = ("-hotness", "-activity_type", "-id")
     
     
+# ============================================================
+#  FEED ITEM BUILDERS
+# ============================================================
+
+
+def gig_item(g, score=None):
+    return {
+        "type": "gig",
+        "id": g.id,
+        "created_at": g.created_at,
+        "user_id": g.organizer_id,
+        "username": g.organizer.username,
+        "profile_image_url": (g.organizer.profile_image.url if getattr(g.organizer, "profile_image", None)else None),
+        "title": g.title,
+        "location": getattr(g, "location", None),
+        "date": getattr(g, "date", None),
+        "score": score
+    }
+
+
+def review_item(r, score=None):
+    return {
+        "type": "review",
+        "id": r.id,
+        "created_at": r.created_at,
+        "user_id": r.reviewer_id,
+        "username": r.reviewer.username,
+        "profile_image_url": (r.reviewer.profile_image.url if getattr(r.reviewer, "profile_image", None)else None),
+        "rating": r.rating,
+        "comment": r.comment,
+        "reviewed_user_id": r.reviewed_user_id,
+        "reviewed_username": r.reviewed_user.username if r.reviewed_user else None,
+        "score": score
+    }
+
+
+def hydrate(refs):
+    """
+    Turn a page of (activity_type, object_id, score) refs into feed items,
+    preserving their order. Only the gigs / reviews on the page are loaded.
+    """
+    gig_ids = [object_id for activity_type, object_id, _ in refs if activity_type == "gig"]
+    review_ids = [object_id for activity_type, object_id, _ in refs if activity_type == "review"]
+
+    gigs = Gig.objects.select_related("organizer").in_bulk(gig_ids)
+    reviews = Review.objects.select_related("reviewer", "reviewed_user").in_bulk(review_ids)
+
+    items = []
+    for activity_type, object_id, score in refs:
+        if activity_type == "gig" and object_id in gigs:
+            items.append(gig_item(gigs[object_id], score))
+        elif activity_type == "review" and object_id in reviews:
+            items.append(review_item(reviews[object_id], score))
+    return items
+
+
+def hydrate_entries(entries):
+    return hydrate([(e.activity_type, e.object_id, None) for e in entries])
+
+
+def parse_since(since, now):
+    """
+    Translate ?since=24h | 7d | 3m into a cutoff datetime. None for "all"
+    and for values that don't parse, which leave the feed unfiltered.
+    """
+    try:
+        if since.endswith('h'):
+            return now - timedelta(hours=int(since[:-1]))
+        elif since.endswith('d'):
+            return now - timedelta(days=int(since[:-1]))
+        elif since.endswith('m'):
+            return now - timedelta(days=30 * int(since[:-1]))
+    except ValueError:
+        pass
+    return None
+
+
 # ============================================================
 #  USER FEED (GIGS + REVIEWS + SORTING + FILTERS)
 # ============================================================
@@ -32,175 +123,153 @@ class UserFeedView(APIView):
     def get(self, request):
         user = request.user
         
-        
         # --------------------------------------------------------
-        # Blocked users (cannot appear in your feed)
+        # Cached page (invalidated by bumping the user's feed
+        # version, see accounts.services.feed_cache). The page is
+        # stored with its ETag, so a conditional GET on a cached
+        # feed answers 304 without touching the database
         # --------------------------------------------------------
-        blocked_ids = set()
-        if hasattr(user,"blocks"):
-            blocked_ids.update(user.blocks.values_list("id", flat=True))
-        if hasattr(user, "blocked_by"):
-            blocked_ids.update(user.blocked_by.values_list("id", flat=True))
         
+        if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+        cached = feed_cache.get_page(user.id, request.query_params)
+        if cached is not None:
+            etag, data = cached
+            if etag in if_none_match:
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+            return Response(data, headers={"ETag": etag})
         
         # --------------------------------------------------------
-        # Following + optional include self
+        # Not cached: the ETag only depends on the newest timeline
+        # entry and the user's feed version, so an unchanged feed
+        # still answers 304 without building any items
         # --------------------------------------------------------
-            
-        following_ids = set(user.following.exclude(id__in=blocked_ids).values_list("id", flat=True))
+        
+        newest = (
+            FeedEntry.objects.filter(user=user)
+            .order_by(*FeedCursorPagination.ordering)
+            .values_list("created_at", "id")
+            .first()
+        )
+        etag = feed_cache.etag(user.id, request.query_params, newest)
+        if etag in if_none_match:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
         
         include_self = request.query_params.get("include_self","true").lower()== "true"
-        if include_self:
-            following_ids.add(user.id)
-            
-        now = timezone.now()
-        recent_cutoff = now - timedelta(days=30)
-            
+        sort_mode = request.query_params.get('sort', 'recent').lower()
         
-        # --------------------------------------------------------
-        # Fetch Gigs
-        # --------------------------------------------------------    
+        if sort_mode == "trending":
+            response = self.get_trending(request, user, include_self)
+        else:
+            response = self.get_recent(request, user, include_self)
             
-        gigs_qs = (
-            Gig.objects.filter(organizer_id__in=following_ids)
-            .select_related("organizer")
-            .annotate(
-                review_count=Count("reviews", distinct=True),
-                recent_score=Count("reviews", filter=Q(created_at__gte=recent_cutoff))
-            )
-        )
-        
+        feed_cache.set_page(user.id, request.query_params, etag, response.data)
+        response["ETag"] = etag
+        return response
+    
+    
+    def get_recent(self, request, user, include_self):
         
         # --------------------------------------------------------
-        # Fetch Reviews (limit 200)
+        # Materialized timeline (fanned out when gigs / reviews
+        # are written, see accounts.services.timeline)
         # --------------------------------------------------------
         
-        reviews_qs = (
-            Review.objects.filter(reviewer_id__in=following_ids)
-            .select_related("reviewer", "reviewed_user")
-            .order_by("-created_at")[:200]
-        )
-        
-        items = []
-        
+        entries = FeedEntry.objects.filter(user=user)
         
+        if not include_self:
+            entries = entries.exclude(actor_id=user.id)
+            
         # --------------------------------------------------------
-        # Process Gigs → Feed Items
+        # Optional: Filter feed by time window: ?since=24h | 7d | 3m
         # --------------------------------------------------------
         
-    
-        for g in gigs_qs:
-            age_days = max((now - g.created_at).days, 1)
-            trending_score = g.review_count * 2 + g.recent_score * 3 + (30 / age_days)
-            items.append({
-                
-                "type": "gig",
-                "id": g.id,
-                "created_at": g.created_at,
-                "user_id": g.organizer_id,
-                "username": g.organizer.username,
-                "profile_image_url": (g.organizer.profile_image.url if getattr(g.organizer, "profile_image", None)else None),
-                "title": g.title,
-                "location": getattr(g, "location", None),
-                "date": getattr(g, "date", None),
-                "score": trending_score
-                
-            })
+        cutoff = parse_since(request.query_params.get('since', 'all').lower(), timezone.now())
+        if cutoff:
+            entries = entries.filter(created_at__gte=cutoff)
             
         # --------------------------------------------------------
-        # Process Reviews → Feed Items
-        # --------------------------------------------------------    
-            
-            
-        for r in reviews_qs:
-            age_days = max((now - r.created_at).days, 1)
-            trending_score = (10/ age_days) + (r.rating or 0)
-            items.append({
-                "type": "review",
-                "id": r.id,
-                "created_at": r.created_at,
-                "user_id": r.reviewer_id,
-                "username": r.reviewer.username,
-                "profile_image_url": (r.reviewer.profile_image.url if getattr(r.reviewer, "profile_image", None)else None),
-                "rating": r.rating,
-                "comment": r.comment,
-                "reviewed_user_id": r.reviewed_user_id,
-                "reviewed_username": r.reviewed_user.username if r.reviewed_user else None,
-                "score": trending_score
-            })
-            
-         
+        # Filter by type ?type=gig or ?type=review
         # --------------------------------------------------------
-        # Optional: Filter feed by time window: ?since=24h | 7d | 3m
-        # --------------------------------------------------------    
-            
-            
-        since = request.query_params.get('since', 'all').lower()
         
+        activity_type = request.query_params.get("type", "all").lower()
         
-        if since != 'all':
-            now = timezone.now()
-            cutoff = None
+        if activity_type in ["gig", "gigs"]:
+            entries = entries.filter(activity_type="gig")
             
-            try:
-                if since.endswith('h'):
-                    hours = int(since[:-1])
-                    cutoff = now - timedelta(hours=hours)
-                    
-                elif since.endswith('d'):
-                    days = int(since[:-1])
-                    cutoff = now - timedelta(days=days)
-                    
-                elif since.endswith('m'):
-                    months = int(since[:-1])
-                    cutoff = now - timedelta(days=30 * months)  
+        elif activity_type in ["review", "reviews"]:
+            entries = entries.filter(activity_type="review")
             
-                    
-                if cutoff:
-                    filtered = []
-                    for i in items:
-                        created_dt = i['created_at']
-                        if created_dt >= cutoff:
-                            filtered.append(i)
-                    items = filtered
-                   
-            except Exception as e:
-                print("SINCE FILTER ERROR:", e)
-                pass             
+        # --------------------------------------------------------
+        # Paginate, then load only the gigs / reviews on this page
+        # ?cursor= switches to keyset pagination, ?after= to deltas
+        # --------------------------------------------------------
         
+        if "cursor" in request.query_params or "after" in request.query_params:
+            paginator = FeedCursorPagination()
+        else:
+            paginator = FeedPagination()
+            entries = entries.order_by(*FeedCursorPagination.ordering)
+        page = paginator.paginate_queryset(entries, request)
+        serializer = ActivityItemSerializer(hydrate_entries(page), many=True)
+        return paginator.get_paginated_response(serializer.data)
+    
+    
+    def get_trending(self, request, user, include_self):
+        # --------------------------------------------------------
+        # Blocked users (cannot appear in your feed)
+        # --------------------------------------------------------
+        blocked_ids = block_cache.excluded_ids(user)
         
         
         # --------------------------------------------------------
-        # Filter by type ?type=gig or ?type=review
+        # Following + optional include self
         # --------------------------------------------------------
-        
             
-        sort_mode = request.query_params.get('sort', 'recent').lower()
-        
-        activity_type = request.query_params.get("type", "all").lower()
+        following_ids = set(user.following.exclude(id__in=blocked_ids).values_list("id", flat=True))
         
-        if activity_type in ["gig", "gigs"]:
-            items = [i for i in items if i["type"] == "gig"]
-            
-        elif activity_type in ["review", "reviews"]:
-            items = [i for i in items if i["type"] == "review"]
+        if include_self:
+            following_ids.add(user.id)
             
-        
         # --------------------------------------------------------
-        # Sorting Mode ?sort=trending or ?sort=recent
+        # Optional: Filter feed by time window: ?since=24h | 7d | 3m
+        # and by type ?type=gig or ?type=review (applied in SQL)
         # --------------------------------------------------------
         
-        if sort_mode == "trending":    
-            items.sort(key=lambda x: x["score"], reverse=True)
-        else:
-            items.sort(key=lambda x: x["created_at"], reverse=True)
-            
+        cutoff = parse_since(request.query_params.get('since', 'all').lower(), timezone.now())
+        activity_type = request.query_params.get("type", "all").lower()
+        
+        include_gigs = activity_type not in ["review", "reviews"]
+        include_reviews = activity_type not in ["gig", "gigs"]
+        
         
         # --------------------------------------------------------
-        # Paginate
+        # Stored hotness scores (see accounts.services.trending).
+        # Each branch is cut to one page before the UNION ALL, and
+        # ?cursor= continues after the last (hotness, type, id)
         # --------------------------------------------------------
         
-        paginator = FeedPagination()
-        page = paginator.paginate_queryset(items, request)
-        serializer = ActivityItemSerializer(page, many=True)
+        branches = []
+        
+        if include_gigs:
+            gigs_qs = Gig.objects.filter(organizer_id__in=following_ids)
+            if cutoff:
+                gigs_qs = gigs_qs.filter(created_at__gte=cutoff)
+            branches.append(
+                gigs_qs.annotate(activity_type=Value("gig", output_field=CharField()))
+                .values("activity_type", "id", "hotness")
+            )
+            
+        if include_reviews:
+            reviews_qs = Review.objects.filter(reviewer_id__in=following_ids)
+            if cutoff:
+                reviews_qs = reviews_qs.filter(created_at__gte=cutoff)
+            branches.append(
+                reviews_qs.annotate(activity_type=Value("review", output_field=CharField()))
+                .values("activity_type", "id", "hotness")
+            )
+            
+        paginator = TrendingCursorPagination()
+        page = paginator.paginate_union(branches, request)
+        refs = [(row["activity_type"], row["id"], row["hotness"]) for row in page]
+        serializer = ActivityItemSerializer(hydrate(refs), many=True)
         return paginator.get_paginated_response(serializer.data)
\ No newline at end of file
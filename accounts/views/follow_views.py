@@ -3,16 +3,17 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from django.db.models import Q, Count
-from django.core.cache import cache
 from django.utils import timezone
 from datetime import timedelta
 from rest_framework.pagination import PageNumberPagination
-import random
-import math
 
 
-from accounts.models import CustomUser, FollowRequest, Notification
+from accounts.models import CustomUser, Follow, FollowRequest, FollowSuggestion
+from accounts.pagination import KeysetPagination
 from accounts.serializers import UserMiniSerializer
+from accounts.services import block_cache, notify, relationships, suggestion_cache, suggestions
+from accounts.services import suggestion_scoring as scoring
+from accounts.services.graph import get_graph
 
 
 class UnfollowUserView(APIView):
@@ -32,6 +33,33 @@ class UnfollowUserView(APIView):
         return Response({"message":"Unfollow Successful"})
 
 
+# ============================================================
+#  RELATIONSHIPS (batch follow / block / request state)
+# ============================================================
+
+MAX_RELATIONSHIP_IDS = 100
+
+
+class RelationshipsView(APIView):
+    """GET ?ids=1,2,3 -> the viewer's relationship with each user, in a constant number of queries."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        raw_ids = request.query_params.get("ids", "")
+        try:
+            ids = list(dict.fromkeys(int(part) for part in raw_ids.split(",") if part.strip()))
+        except ValueError:
+            return Response({"error": "ids must be a comma-separated list of user ids."}, status=400)
+
+        if len(ids) > MAX_RELATIONSHIP_IDS:
+            return Response({"error": f"At most {MAX_RELATIONSHIP_IDS} ids per request."}, status=400)
+
+        resolved = relationships.resolve(request.user, ids)
+        return Response({
+            "results": [{"id": user_id, **resolved[user_id]} for user_id in ids],
+        })
+
+
 # ============================================================
 #  REMOVE FOLLOWER
 # ============================================================
@@ -66,7 +94,7 @@ class SendFollowRequestView(APIView):
         if target_user == request.user:
             return Response({"error": "You cannot follow yourself."}, status=status.HTTP_400_BAD_REQUEST)
         
-        if target_user in request.user.blocks.all() or request.user in target_user.blocks.all():
+        if relationships.between(request.user, target_user)["is_blocked"]:
             return Response({"error": "You cannot interact with this user."},status=400)
     
         follow_request, created = FollowRequest.objects.get_or_create(
@@ -80,9 +108,12 @@ class SendFollowRequestView(APIView):
                 return Response({"message":"You already follow this user."}, status=status.HTTP_200_OK)
             return Response({"message":"FollowRequest already sent."}, status=status.HTTP_200_OK)
             
-        Notification.objects.create(
-            user=target_user,
-            message=f"{request.user.username} requested to follow you."
+        notify.notify(
+            target_user,
+            f"{request.user.username} requested to follow you.",
+            actor=request.user,
+            group="follow_request",
+            grouped_message="{count} people requested to follow you.",
         )
         
         return Response({"message":"Follow request sent."})
@@ -104,10 +135,7 @@ class AcceptFollowRequestView(APIView):
         
         follow_request.to_user.followers.add(follow_request.from_user)
         
-        Notification.objects.create(
-            user=follow_request.from_user,
-            message=f"{request.user.username} accepted your follow request."
-        )
+        notify.notify(follow_request.from_user, f"{request.user.username} accepted your follow request.")
         
         return Response({"message":"Follow request accepted."}, status=status.HTTP_200_OK)
     
@@ -121,10 +149,7 @@ class RejectFollowRequestView(APIView):
         )
         follow_request.delete()
         
-        Notification.objects.create(
-            user=follow_request.from_user,
-            message=f"{request.user.username} rejected your follow request."
-        )
+        notify.notify(follow_request.from_user, f"{request.user.username} rejected your follow request.")
         
         
         return Response({"message":"Follow request rejected."}, status=status.HTTP_200_OK)
@@ -148,10 +173,7 @@ class CancelFollowRequestView(APIView):
             
         follow_request.delete()
         
-        Notification.objects.create(
-            user=target_user,
-            message=f"{request.user.username} canceled their follow request."
-        )
+        notify.notify(target_user, f"{request.user.username} canceled their follow request.")
         
         return Response({"message": "Follow request canceled."}, status=status.HTTP_200_OK)
     
@@ -203,14 +225,14 @@ class MutualFollowersView(APIView):
         user1 = get_object_or_404(CustomUser, id=user_id)
         user2 = get_object_or_404(CustomUser, id=other_id)
         
-        user2_follower_ids = user2.followers.values_list("id", flat=True)
+        mutual_ids = get_graph().mutual_followers(user1.id, user2.id)
         
-        mutuals = user1.followers.filter(id__in=user2_follower_ids)
+        mutuals = CustomUser.objects.filter(id__in=mutual_ids)
         
         serializer = UserMiniSerializer(mutuals, many=True)
         
         return Response({
-            "count": mutuals.count(),
+            "count": len(mutual_ids),
             "results": serializer.data
         })
         
@@ -224,9 +246,11 @@ class MutualFollowingView(APIView):
         user1 = get_object_or_404(CustomUser, id=user_id)
         user2 = get_object_or_404(CustomUser, id=other_id)
         
-        user1_follows_user2 = user2.followers.filter(id=user1.id).exists()
+        graph = get_graph()
+        
+        user1_follows_user2 = graph.is_following(user1.id, user2.id)
         
-        user2_follows_user1 = user1.followers.filter(id=user2.id).exists()
+        user2_follows_user1 = graph.is_following(user2.id, user1.id)
         
         mutual = user1_follows_user2 and user2_follows_user1
         
@@ -246,53 +270,35 @@ class FollowSuggestionsView(APIView):
 
     def get(self, request, user_id):
         user = get_object_or_404(CustomUser, id=user_id)
-
-        # Get IDs of people the user is already following
-        already_following = user.following.values_list("id", flat=True)
-
-        # A base queryset of all other users, excluding yourself and people you already follow
-        qs = CustomUser.objects.exclude(id__in=already_following).exclude(id=user.id)
-        
-        qs = qs.exclude(id__in=user.blocked_by.values_list("id", flat=True))
-        qs = qs.exclude(id__in=user.blocks.values_list("id", flat=True))
-        # Annotate suggestion relevance:
-        qs = qs.annotate(
-            # Same city score
-            same_city=Count("id", filter=Q(city=user.city)),
-
-            # Skill overlap score
-            shared_skills=Count("skills", filter=Q(skills__in=user.skills.all()), distinct=True),
-
-            # Mutual followers (people who follow both)
-            mutual_followers=Count(
-                "followers",
-                filter=Q(followers__in=user.followers.all()),
-                distinct=True
-            ),
-
-            # People you follow who follow them
-            followed_by_following=Count(
-                "followers",
-                filter=Q(followers__in=user.following.all()),
-                distinct=True
-            )
-        ).order_by(
-            "-mutual_followers",
-            "-followed_by_following",
-            "-shared_skills",
-            "-same_city",
-            "username",
+        return Response(suggestion_cache.get_or_compute("basic", user.id, lambda: self.compute(user)))
+
+    def compute(self, user):
+        # Rows are precomputed by refresh_follow_suggestions; users it hasn't
+        # reached yet get theirs computed on first request. No cache bump
+        # here: this response is cached under the current version.
+        if not FollowSuggestion.objects.filter(user=user).exists():
+            suggestions.refresh([user.id], invalidate=False)
+
+        # The table can lag behind follows and blocks made since the last refresh.
+        already_following = get_graph().following_of(user.id)
+        blocked = block_cache.excluded_ids(user)
+
+        qs = (
+            FollowSuggestion.objects.filter(user=user)
+            .exclude(candidate_id__in=already_following | blocked)
+            .select_related("candidate")
+            .order_by("-score", "candidate_id")
         )
 
         # Limit results
-        results = qs[:20]
+        results = [suggestion.candidate for suggestion in qs[:20]]
 
         serializer = UserMiniSerializer(results, many=True)
 
-        return Response({
+        return {
             "count": qs.count(),
-            "results": serializer.data,
-        })
+            "results": list(serializer.data),
+        }
         
         
         
@@ -306,19 +312,16 @@ class AdvancedFollowSuggestionsView(APIView):
 
     def get(self, request, user_id):
         user = get_object_or_404(CustomUser, id=user_id)
-        cache_key = f"suggestions_{user_id}"
 
-        # ✅ 1. Check cache
-        cached = cache.get(cache_key)
-        if cached:
-            return Response(cached)
+        # ✅ 1. Cached per user (single-flight, stale-while-revalidate, invalidated on follow / block / skills)
+        return Response(suggestion_cache.get_or_compute("advanced", user.id, lambda: self.compute(user)))
 
-        already_following = set(user.following.values_list("id", flat=True))
+    def compute(self, user):
+        already_following = get_graph().following_of(user.id)
 
         # ✅ 2. Exclude self + already following
         qs = CustomUser.objects.exclude(id=user.id).exclude(id__in=already_following)
-        qs = qs.exclude(id__in=user.blocked_by.values_list("id", flat=True))
-        qs = qs.exclude(id__in=user.blocks.values_list("id", flat=True))
+        qs = qs.exclude(id__in=block_cache.excluded_ids(user))
 
         # ✅ 3. Exclude inactive users
         recent_cutoff = timezone.now() - timedelta(days=30)
@@ -326,7 +329,7 @@ class AdvancedFollowSuggestionsView(APIView):
 
         # ✅ 4. Annotate with base signals
         qs = qs.annotate(
-            same_city=Count("id", filter=Q(city=user.city)),
+            same_city=Count("id", filter=Q(city=user.city), distinct=True),
             shared_skills=Count("skills", filter=Q(skills__in=user.skills.all()), distinct=True),
             mutual_followers=Count("followers", filter=Q(followers__in=user.followers.all()), distinct=True),
             followed_by_following=Count("followers", filter=Q(followers__in=user.following.all()), distinct=True),
@@ -335,70 +338,30 @@ class AdvancedFollowSuggestionsView(APIView):
         # ✅ 5. Trending score (followers gained recently)
         trending_cutoff = timezone.now() - timedelta(days=7)
         qs = qs.annotate(
-            trending=Count("followers", filter=Q(followers__last_login__gte=trending_cutoff))
+            trending=Count("followers", filter=Q(followers__last_login__gte=trending_cutoff), distinct=True)
         )
 
-        suggestions = []
-
-        # ✅ 6. Convert queryset into list so we can compute distances + scoring
-        for candidate in qs:
-            # Distance (apply only if both have lat/lng)
-            distance_score = 0
-            if user.latitude and user.longitude and candidate.latitude and candidate.longitude:
-                try:
-                    lat1, lon1 = math.radians(user.latitude), math.radians(user.longitude)
-                    lat2, lon2 = math.radians(candidate.latitude), math.radians(candidate.longitude)
-                    distance = 6371 * math.acos(
-                        math.cos(lat1)*math.cos(lat2)*math.cos(lon2 - lon1) +
-                        math.sin(lat1)*math.sin(lat2)
-                    )
-                    distance_score = max(0, 10 - (distance / 10))
-                except:
-                    distance_score = 0
-
-            # Role score
-            role_score = 2 if getattr(candidate, "role", None) == "musician" else 0
-
-            # Random freshness
-            random_boost = random.uniform(0, 1)
-
-            # Final score
-            score = (
-                candidate.mutual_followers * 4 +
-                candidate.followed_by_following * 3 +
-                candidate.shared_skills * 2 +
-                candidate.same_city * 2 +
-                candidate.trending * 1 +
-                distance_score * 1 +
-                role_score +
-                random_boost
-            )
-
-            suggestions.append({
-                "user": candidate,
-                "score": round(score, 3)
-            })
+        # ✅ 6. Pull the features as columns and score every candidate at once
+        features = scoring.columns(qs.values_list(*scoring.FEATURES))
+        scores = scoring.score(features, user.latitude, user.longitude)
 
-        # ✅ 7. Sort by score descending
-        suggestions.sort(key=lambda x: x["score"], reverse=True)
+        # ✅ 7. Top 20 by score
+        top = scoring.top_k(features["id"], scores, 20)
 
         # ✅ 8. Serialize top results
+        users = CustomUser.objects.in_bulk([candidate_id for candidate_id, _ in top])
         results = [
             {
-                "id": s["user"].id,
-                "username": s["user"].username,
-                "profile_image": s["user"].profile_image.url if s["user"].profile_image else None,
-                "score": s["score"]
+                "id": candidate_id,
+                "username": users[candidate_id].username,
+                "profile_image": users[candidate_id].profile_image.url if users[candidate_id].profile_image else None,
+                "score": round(score, 3)
             }
-            for s in suggestions[:20]
+            for candidate_id, score in top
+            if candidate_id in users
         ]
 
-        response = {"count": len(results), "results": results}
-
-        # ✅ 9. Cache for 10 minutes
-        cache.set(cache_key, response, timeout=600)
-
-        return Response(response)
+        return {"count": len(results), "results": results}
     
     
 # ============================================================
@@ -411,21 +374,39 @@ class StandardResultSetPagination(PageNumberPagination):
     page_size_query_param = 'page_size'
     max_page_size = 50   
 
-class FollowersListView(generics.ListAPIView):
-    serializer_class = UserMiniSerializer
-    permission_classes = [permissions.AllowAny]
-    pagination_class = StandardResultSetPagination
-    
-    def get_queryset(self):
-        user = get_object_or_404(CustomUser, id=self.kwargs['user_id'])
-        return user.followers.all()
-    
-class FollowingListView(generics.ListAPIView):
-    serializer_class = UserMiniSerializer
+class FollowCursorPagination(KeysetPagination):
+    """Keyset pagination over follow edges by (created_at, id)."""
+    page_size = 20
+    max_page_size = 100
+    ordering = ("-created_at", "-id")
+
+
+class FollowEdgeListView(generics.ListAPIView):
+    """Lists one side of a user's follow edges, newest follow first."""
     permission_classes = [permissions.AllowAny]
-    pagination_class = StandardResultSetPagination
-    
+    pagination_class = FollowCursorPagination
+    edge_filter = None
+    listed_user = None
+
     def get_queryset(self):
         user = get_object_or_404(CustomUser, id=self.kwargs['user_id'])
-        return user.following.all()
+        return Follow.objects.filter(**{self.edge_filter: user}).select_related(self.listed_user)
+
+    def list(self, request, *args, **kwargs):
+        edges = self.paginate_queryset(self.get_queryset())
+        users = [getattr(edge, self.listed_user) for edge in edges]
+        data = UserMiniSerializer(users, many=True, context=self.get_serializer_context()).data
+        for item, edge in zip(data, edges):
+            item["followed_at"] = edge.created_at
+        return self.get_paginated_response(data)
+
+
+class FollowersListView(FollowEdgeListView):
+    edge_filter = "followee"
+    listed_user = "follower"
+
+
+class FollowingListView(FollowEdgeListView):
+    edge_filter = "follower"
+    listed_user = "followee"
     
@@ -1,13 +1,32 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
 from rest_framework import generics, permissions, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from django.db.models import Q
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.dateparse import parse_datetime
 
-from accounts.models import Notification
+from accounts.models import CustomUser, Notification
 from accounts.serializers import NotificationSerializer
+from accounts.services import counters, notification_stream
 from rest_framework.pagination import PageNumberPagination
 
 
+STREAM_KEEPALIVE_SECONDS = 25
+STREAM_REPLAY_LIMIT = 50
+
+
+def unread_notifications(user):
+    return CustomUser.objects.filter(id=user.id).values_list("unread_notifications_count", flat=True).first() or 0
+
+
 
 # ============================================================
 #  PAGINATION
@@ -29,7 +48,7 @@ class NotificationListView(generics.ListAPIView):
     pagination_class = NotificationPagination
     
     def get_queryset(self):
-        return Notification.objects.filter(user=self.request.user).order_by('-created_at')
+        return Notification.objects.filter(user=self.request.user).order_by('-created_at', '-id')
     
     
 
@@ -47,10 +66,12 @@ class NotificationMarkReadView(generics.UpdateAPIView):
     
     def patch(self, request, *args, **kwargs):
         notification = self.get_object()
-        notification.is_read = True
-        notification.save(update_fields=['is_read'])
         
-        unread_count = Notification.objects.filter(user=request.user, is_read=False).count()
+        # Only the request that actually flips the row decrements the counter.
+        if Notification.objects.filter(id=notification.id, is_read=False).update(is_read=True):
+            counters.adjust("unread_notifications_count", [request.user.id], -1)
+        
+        unread_count = unread_notifications(request.user)
         
         return Response({
             "message": "Notification marked as read.",
@@ -67,8 +88,12 @@ class NotificationMarkAllReadView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def patch(self, request):
-        Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
-        unread_count = 0
+        marked = Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+        # Subtract what was marked rather than zeroing, so notifications
+        # created meanwhile stay counted.
+        if marked:
+            counters.adjust("unread_notifications_count", [request.user.id], -marked)
+        unread_count = unread_notifications(request.user)
         return Response({
             "message": "All notifications marked as read.",
             "unread_count": unread_count
@@ -83,5 +108,98 @@ class UnreadNotificationCountView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get(self, request):
-        count = Notification.objects.filter(user=request.user, is_read=False).count()
+        # Stored on the user row, which authentication has already loaded.
+        count = request.user.unread_notifications_count
         return Response({"unread_count": count}, status=status.HTTP_200_OK)
+
+
+# ============================================================
+#  LIVE STREAM (Server-Sent Events, ASGI only)
+# ============================================================
+
+def stream_user(request):
+    """
+    JWT user for the stream. EventSource can't send headers, so the access
+    token may also come as ``?token=``.
+    """
+    auth = JWTAuthentication()
+    raw_token = request.GET.get("token")
+    if not raw_token:
+        header = auth.get_header(request)
+        raw_token = header and auth.get_raw_token(header)
+    if not raw_token:
+        return None
+    try:
+        return auth.get_user(auth.get_validated_token(raw_token))
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+
+def sse_event(message):
+    # The event id carries created_at as well: coalesced notifications are
+    # updated in place and move forward in time without getting a new id.
+    event_id = f"{message['created_at']}|{message['id']}" if message["created_at"] else message["id"]
+    return f"id: {event_id}\nevent: notification\ndata: {json.dumps(message)}\n\n"
+
+
+def parse_event_id(value):
+    """(created_at, id) from a Last-Event-ID; created_at is None for a bare id."""
+    if not value:
+        return None, None
+    created_at, _, notification_id = value.rpartition("|")
+    if not notification_id.isdigit():
+        return None, None
+    try:
+        created_at = parse_datetime(created_at) if created_at else None
+    except ValueError:
+        created_at = None
+    return created_at, int(notification_id)
+
+
+async def notification_stream_view(request):
+    """
+    Push new notifications to the client as they are delivered. On reconnect
+    the browser sends Last-Event-ID and the notifications it missed, new or
+    coalesced into since, are replayed first.
+    """
+    user = await sync_to_async(stream_user)(request)
+    if user is None:
+        return JsonResponse({"detail": "Authentication credentials were not provided or are invalid."}, status=401)
+
+    last_event_id = request.headers.get("Last-Event-ID") or request.GET.get("last_event_id")
+    last_created_at, last_id = parse_event_id(last_event_id)
+
+    async def events():
+        hub = notification_stream.get_hub()
+        # Subscribe before replaying so nothing slips between the two.
+        queue = await hub.subscribe(user.id)
+        # Coalesced notifications are re-sent under the same id as they grow,
+        # so duplicates are recognised by (id, actor_count).
+        replayed = set()
+        try:
+            yield "retry: 5000\n\n"
+            if last_id is not None:
+                # New rows have a higher id; coalesced rows updated since
+                # keep their id but have a later created_at.
+                since = Q(id__gt=last_id)
+                if last_created_at is not None:
+                    since |= Q(created_at__gt=last_created_at)
+                missed = Notification.objects.filter(since, user_id=user.id).order_by("created_at", "id")
+                async for notification in missed[:STREAM_REPLAY_LIMIT]:
+                    replayed.add((notification.id, notification.actor_count))
+                    yield sse_event(notification_stream.payload(notification))
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if (message["id"], message["actor_count"]) not in replayed:
+                    yield sse_event(message)
+        finally:
+            hub.unsubscribe(user.id, queue)
+
+    response = StreamingHttpResponse(events(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
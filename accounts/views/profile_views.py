@@ -10,6 +10,7 @@ from accounts.serializers import (
     UserMiniSerializer,
 )
 from accounts.models import CustomUser
+from accounts.services import block_cache, relationships
 from rest_framework.exceptions import PermissionDenied
 
 User = get_user_model()
@@ -48,8 +49,7 @@ class UserListView(generics.ListAPIView):
         qs = User.objects.all()
 
         if user.is_authenticated:
-            qs = qs.exclude(id__in=user.blocks.values_list("id", flat=True))
-            qs = qs.exclude(id__in=user.blocked_by.values_list("id", flat=True))
+            qs = qs.exclude(id__in=block_cache.excluded_ids(user))
 
         return qs
             
@@ -71,17 +71,16 @@ class PublicProfileView(generics.RetrieveAPIView):
     
     def get_object(self):
         obj = super().get_object()
-        request = self.request
         
-        if request.user.is_authenticated:
-            if(
-                obj in request.user.blocks.all()
-                or request.user in obj.blocks.all()
-            ):
-                raise PermissionDenied("You cannot view this profile")
+        # Resolved once here and reused by the serializer's relationship fields.
+        relationship = relationships.between(self.request.user, obj)
+        if relationship["is_blocked"]:
+            raise PermissionDenied("You cannot view this profile")
+        self.resolved_relationships = {obj.id: relationship}
         return obj
     
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context['request'] = self.request
+        context['relationships'] = getattr(self, "resolved_relationships", {})
         return context
\ No newline at end of file
@@ -1,12 +1,17 @@
-from rest_framework import permissions
+from rest_framework import permissions, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.utils.urls import replace_query_param
+from django.contrib.postgres.search import TrigramSimilarity
+from django.core.cache import cache
+from django.db import connection, transaction, OperationalError
 from django.utils import timezone
-import math
+import hashlib
 
 from accounts.models import CustomUser
 from accounts.serializers import UserSerializer
+from accounts.services import block_cache, search, search_cache
 
 from accounts.views.follow_views import StandardResultSetPagination
 
@@ -24,156 +29,209 @@ class UserSearchView(APIView):
         skill_id = request.query_params.get("skill")
         city = request.query_params.get("city")
         country = request.query_params.get("country")
+        radius_km = request.query_params.get("radius_km")
         
         user = request.user
         
         
         # ------------------------------------------------------
-        # Blocked users cannot appear in search
+        # "Near me": ?radius_km=25 around the viewer's location
         # ------------------------------------------------------
         
-        blocked_ids = set(user.blocks.values_list("id", flat=True))
-        blocked_by_ids = set(user.blocked_by.values_list("id", flat=True))
-        excluded_ids = blocked_ids.union(blocked_by_ids)
+        near = None
+        if radius_km:
+            try:
+                radius_km = float(radius_km)
+            except ValueError:
+                return Response({"error": "radius_km must be a number."}, status=status.HTTP_400_BAD_REQUEST)
+            if radius_km <= 0:
+                return Response({"error": "radius_km must be positive."}, status=status.HTTP_400_BAD_REQUEST)
+            if user.latitude is None or user.longitude is None:
+                return Response({"error": "Set your location to search nearby."}, status=status.HTTP_400_BAD_REQUEST)
+            near = (user.latitude, user.longitude, radius_km)
         
-        qs = CustomUser.objects.exclude(id__in=excluded_ids)
         
         # ------------------------------------------------------
-        # Text search
+        # Blocked users cannot appear in search
         # ------------------------------------------------------
-
         
-        if q:
-            qs = qs.filter(
-                Q(username__icontains=q) |
-                Q(bio__icontains=q)
-            )
-            
-        # ------------------------------------------------------
-        # Skill filter
-        # ------------------------------------------------------   
-            
-        if skill_id:
-            qs =qs.filter(skills__id=skill_id)
-            
+        excluded_ids = block_cache.excluded_ids(user)
         
         # ------------------------------------------------------
-        # Location filters
-        # ------------------------------------------------------    
-            
-        if city:
-            qs = qs.filter(city__iexact=city)
-        if country:
-            qs =qs.filter(country__iexact=country)
-            
+        # ?ranking=cached: normalized, viewer-independent
+        # candidates from the cache + per-viewer overlay (blocks,
+        # shared skills, mutual followers, distance). Only the
+        # top MAX_CANDIDATES by base score are ranked
         # ------------------------------------------------------
-        # Ranking signals data
-        # ------------------------------------------------------
-            
-        user_skill_ids = set(user.skills.values_list("id", flat=True))
-        user_follower_ids = set(user.followers.values_list("id", flat=True))
         
-        now = timezone.now()
-        results = []
+        ranking = request.query_params.get("ranking", "sql")
+        if ranking == "cached" and near is None:
+            return self.get_cached(request, excluded_ids, q, skill_id, city, country)
         
+        qs = CustomUser.objects.exclude(id__in=excluded_ids)
         
         # ------------------------------------------------------
-        # Build ranking score for every candidate
+        # Text search (GIN-indexed tsvector), skill, location
+        # and radius filters
         # ------------------------------------------------------
         
-        for candidate in qs.select_related().prefetch_related("skills", "followers"):
-            
-            score = 0
-            
-            #  1. Shared Skills (strong weight)
-            candidate_skill_ids = set(candidate.skills.values_list("id", flat=True))
-            shared_skill_count = len(user_skill_ids & candidate_skill_ids)
-            score += shared_skill_count * 3
-            
-            # 2. Mutual followers
-            candidate_follower_ids = set(candidate.followers.values_list("id", flat=True))
-            mutual_followers = len(user_follower_ids & candidate_follower_ids)
-            score += mutual_followers * 2
-            
-            # 3. Recent activity
-            last_login = candidate.last_login
-            
-            if last_login:
-                days_inactive = (now - last_login).days
-                if days_inactive <= 7:
-                    score += 10
-                elif days_inactive <= 30:
-                    score += 5
-                elif days_inactive <= 60:
-                    score += 1
-                else:
-                    score -= 3
-                    
-            distance_score = 0
-            
-            # --------------------------------------------------
-            # Physical distance scoring (optional)
-            # --------------------------------------------------
-            
-            if user.latitude and user.longitude and candidate.latitude and candidate.longitude:
-                try:
-                    dist = self.geo_distance(user.latitude, user.longitude, candidate.latitude, candidate.longitude)
-                    distance_score = max(0,5 - (dist / 10))
-                except:
-                    distance_score = 0
-            score += distance_score
-            
-            
-           
-            # --------------------------------------------------
-            # Query match boost (name relevance)
-            # -------------------------------------------------- 
-            
-            if q:
-                
-                uname = candidate.username.lower()
-                q_lower = q.lower()
-                
-                if uname.startswith(q_lower):
-                    score += 5
-                elif q.lower() in uname:
-                    score += 2
-                    
-            results.append({
-                "user": candidate,
-                "score": round(score, 3)
-            })
-            
-           
+        qs, query = search.filter_candidates(qs, q, skill_id, city, country, near)
+        
         # ------------------------------------------------------
-        # Sort results
-        # ------------------------------------------------------    
-            
-        results.sort(key=lambda x: x["score"], reverse=True)
+        # ?ranking=stream: chunked scan + bounded top-k heap
+        # ------------------------------------------------------
+        
+        if ranking == "stream":
+            return self.get_streamed(request, qs, query)
         
         # ------------------------------------------------------
-        # Pagination
+        # Ranking signals as SQL annotations: shared skills,
+        # mutual followers, recent activity, distance and
+        # full-text relevance (see accounts.services.search).
+        # The default, and always used for radius searches
+        # ------------------------------------------------------
+        
+        qs = search.annotate_scores(qs, user, timezone.now(), query)
+        qs = qs.order_by("-score", "id").prefetch_related("skills")
+        
+        # ------------------------------------------------------
+        # Pagination (ORDER BY score ... LIMIT page_size)
         # ------------------------------------------------------
         
         paginator = StandardResultSetPagination()
-        page = paginator.paginate_queryset(results, request)
+        page = paginator.paginate_queryset(qs, request)
         
-        serializer = UserSerializer([item['user'] for item in page], many=True)
+        serializer = UserSerializer(page, many=True)
         return paginator.get_paginated_response(serializer.data)        
+    
+    
+    def get_streamed(self, request, qs, query):
+        paginator = StandardResultSetPagination()
+        page_size = paginator.get_page_size(request)
+        page_number = self.get_page_number(request, paginator)
         
+        total, ranked = search.stream_top_k(qs, request.user, timezone.now(), page_number * page_size, query)
+        return self.ranked_response(request, paginator, total, ranked, page_number, page_size)
+    
+    
+    def get_cached(self, request, excluded_ids, q, skill_id, city, country):
+        paginator = StandardResultSetPagination()
+        page_size = paginator.get_page_size(request)
+        page_number = self.get_page_number(request, paginator)
+        
+        matches, candidates = search_cache.get_candidates(q, skill_id, city, country, timezone.now())
+        scored = search_cache.overlay(candidates, request.user, excluded_ids)
+        ranked_total, ranked = search.top_k(scored, page_number * page_size)
+        
+        response = self.ranked_response(request, paginator, ranked_total, ranked, page_number, page_size)
+        response.data["count"] = search_cache.visible_matches(matches, candidates, excluded_ids)
+        response.data["count_is_exact"] = matches == len(candidates) or not excluded_ids
+        # Matches past the cap are counted but can't be paged to.
+        response.data["ranked_count"] = ranked_total
+        response.data["ranked_limit"] = search_cache.MAX_CANDIDATES
+        return response
+    
+    
+    def get_page_number(self, request, paginator):
+        try:
+            return max(int(request.query_params.get(paginator.page_query_param, 1)), 1)
+        except ValueError:
+            raise NotFound("Invalid page.")
+    
+    
+    def ranked_response(self, request, paginator, total, ranked, page_number, page_size):
+        page_ids = [user_id for _, user_id in ranked[(page_number - 1) * page_size:]]
+        
+        # Only the winning page is hydrated into model instances.
+        users = CustomUser.objects.prefetch_related("skills").in_bulk(page_ids)
+        serializer = UserSerializer([users[pk] for pk in page_ids if pk in users], many=True)
+        
+        url = request.build_absolute_uri()
+        next_url = None
+        if page_number * page_size < total:
+            next_url = replace_query_param(url, paginator.page_query_param, page_number + 1)
+        previous_url = None
+        if page_number > 1:
+            previous_url = replace_query_param(url, paginator.page_query_param, page_number - 1)
+        
+        return Response({
+            "count": total,
+            "next": next_url,
+            "previous": previous_url,
+            "results": serializer.data,
+        })
+
+
+# ============================================================
+#  USERNAME AUTOCOMPLETE (pg_trgm index, short-TTL cache)
+# ============================================================
+
+
+AUTOCOMPLETE_LIMIT = 8
+AUTOCOMPLETE_MAX_LIMIT = 20
+AUTOCOMPLETE_CANDIDATES = 50
+AUTOCOMPLETE_CACHE_TIMEOUT = 30
+AUTOCOMPLETE_STATEMENT_TIMEOUT_MS = 50
+
+
+class UserAutocompleteView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        prefix = request.query_params.get("q", "").strip().lower()
+        if not prefix:
+            return Response({"results": []})
         
-        # ============================================================
-        #  GEO DISTANCE FUNCTION
-        # ============================================================
+        try:
+            limit = max(1, min(int(request.query_params.get("limit", AUTOCOMPLETE_LIMIT)), AUTOCOMPLETE_MAX_LIMIT))
+        except ValueError:
+            limit = AUTOCOMPLETE_LIMIT
         
+        # ------------------------------------------------------
+        # Viewer-independent candidates, cached per prefix
+        # ------------------------------------------------------
         
-    def geo_distance(self, lat1, lon1, lat2, lon2):
-        lat1, lon1 = math.radians(lat1), math.radians(lon1)
-        lat2, lon2 = math.radians(lat2), math.radians(lon2)
+        cache_key = "autocomplete:" + hashlib.md5(prefix.encode()).hexdigest()
+        candidates = cache.get(cache_key)
+        if candidates is None:
+            candidates = self.lookup(prefix)
+            if candidates is None:
+                # Over the latency budget: answer empty rather than stall typing.
+                return Response({"results": [], "timed_out": True})
+            cache.set(cache_key, candidates, timeout=AUTOCOMPLETE_CACHE_TIMEOUT)
+            
+        # ------------------------------------------------------
+        # Blocked users cannot appear in autocomplete
+        # ------------------------------------------------------
         
-        return 6371 * math.acos(
-            math.cos(lat1)*math.cos(lat2)*math.cos(lon2-lon1) +
-            math.sin(lat1)*math.sin(lat2)
-        )
+        excluded_ids = block_cache.excluded_ids(request.user)
+        
+        storage = CustomUser._meta.get_field("profile_image").storage
+        results = [
+            {
+                "id": pk,
+                "username": username,
+                "profile_image": storage.url(image) if image else None,
+            }
+            for pk, username, image in candidates
+            if pk not in excluded_ids
+        ][:limit]
+        return Response({"results": results})
     
-       
\ No newline at end of file
+    def lookup(self, prefix):
+        qs = (
+            CustomUser.objects.filter(username__istartswith=prefix)
+            .annotate(similarity=TrigramSimilarity("username", prefix))
+            .order_by("-similarity", "username")
+            .values_list("id", "username", "profile_image")[:AUTOCOMPLETE_CANDIDATES]
+        )
+        try:
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        "SET LOCAL statement_timeout = %s", [AUTOCOMPLETE_STATEMENT_TIMEOUT_MS]
+                    )
+                return list(qs)
+        except OperationalError:
+            return None
+
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gigs', '0005_alter_gigapplication_message_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='gig',
+            index=models.Index(fields=['organizer', 'created_at'], name='gig_organizer_created_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gigs', '0006_gig_gig_organizer_created_idx'),
+        ('reviews', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gig',
+            name='hotness',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='gig',
+            index=models.Index(fields=['organizer', '-hotness'], name='gig_organizer_hotness_idx'),
+        ),
+        # Same formula as accounts.services.trending.gig_hotness.
+        migrations.RunSQL(
+            sql="""
+                UPDATE gigs_gig g SET hotness =
+                    (SELECT count(*) FROM reviews_review r WHERE r.gig_id = g.id) * 2
+                    + (SELECT count(*) FROM reviews_review r
+                       WHERE r.gig_id = g.id AND r.created_at >= now() - interval '30 days') * 3
+                    + 30.0 / GREATEST(date_part('day', now() - g.created_at), 1);
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -1,5 +1,8 @@
 from django.db import models
 from django.conf import settings
+from django.db.models.signals import m2m_changed, pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
 from accounts.models import CustomUser
 
 # Create your models here.
@@ -44,6 +47,13 @@ class Gig(models.Model):
     
     is_open = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    hotness = models.FloatField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['organizer', 'created_at'], name='gig_organizer_created_idx'),
+            models.Index(fields=['organizer', '-hotness'], name='gig_organizer_hotness_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.organizer.username}"
@@ -65,4 +75,87 @@ class GigApplication(models.Model):
         unique_together = ('applicant', 'gig')
     
     def __str__(self):
-        return f"{self.applicant.username} → {self.gig.title} ({self.status})"
\ No newline at end of file
+        return f"{self.applicant.username} → {self.gig.title} ({self.status})"
+
+
+@receiver(pre_save, sender=Gig)
+def set_initial_hotness(sender, instance, **kwargs):
+    from accounts.services import trending
+
+    if instance._state.adding:
+        instance.hotness = trending.gig_hotness(0, 0, instance.created_at or timezone.now())
+
+
+@receiver(post_save, sender=Gig)
+def fan_out_gig_on_create(sender, instance, created, **kwargs):
+    from accounts.services import timeline
+
+    if created:
+        timeline.fan_out_gig(instance)
+
+
+@receiver(post_delete, sender=Gig)
+def remove_gig_from_timelines(sender, instance, **kwargs):
+    from accounts.services import timeline
+
+    timeline.remove_activity("gig", instance.id)
+
+
+@receiver(post_save, sender=Gig)
+@receiver(post_delete, sender=Gig)
+def invalidate_feeds_on_gig_change(sender, instance, **kwargs):
+    from accounts.services import feed_cache
+
+    feed_cache.bump_audience(instance.organizer_id)
+
+
+@receiver(post_save, sender=Gig)
+def count_organized_gig(sender, instance, created, **kwargs):
+    from accounts.services import counters
+
+    if created:
+        counters.adjust("organized_gigs_count", [instance.organizer_id], 1)
+
+
+@receiver(pre_delete, sender=Gig)
+def remember_gig_musicians(sender, instance, **kwargs):
+    # The musicians rows are removed by cascade without m2m_changed.
+    instance._musician_ids = list(instance.musicians.values_list("id", flat=True))
+
+
+@receiver(post_delete, sender=Gig)
+def release_gig_counters(sender, instance, **kwargs):
+    from accounts.services import counters
+
+    counters.adjust("organized_gigs_count", [instance.organizer_id], -1)
+    counters.adjust("joined_gigs_count", getattr(instance, "_musician_ids", []), -1)
+
+
+@receiver(m2m_changed, sender=Gig.musicians.through)
+def update_joined_gigs_count(sender, instance, action, reverse, pk_set, **kwargs):
+    from accounts.services import counters
+
+    related = instance.joined_gigs if reverse else instance.musicians
+    if action in ("pre_remove", "pre_clear"):
+        # Only count rows that actually exist, read while they still do.
+        rows = related.all() if action == "pre_clear" else related.filter(pk__in=pk_set)
+        instance._musician_change = set(rows.values_list("pk", flat=True))
+        return
+
+    if action == "post_add":
+        changed, delta = pk_set, 1
+    elif action in ("post_remove", "post_clear"):
+        changed, delta = instance.__dict__.pop("_musician_change", set()), -1
+    else:
+        return
+
+    user_ids = [instance.pk] * len(changed) if reverse else list(changed)
+    counters.adjust("joined_gigs_count", user_ids, delta)
+
+
+@receiver(post_save, sender=Tag)
+def reindex_users_on_tag_rename(sender, instance, created, **kwargs):
+    from accounts.services.search_index import update_search_vector
+
+    if not created:
+        update_search_vector(list(instance.users.values_list("id", flat=True)))
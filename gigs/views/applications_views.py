@@ -4,7 +4,7 @@ from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from ..models import Gig, GigApplication
 from ..serializers import GigApplicationSerializer
-from accounts.models import Notification
+from accounts.services import notify
 
 
 class ApplyToGigView(APIView):
@@ -24,11 +24,13 @@ class ApplyToGigView(APIView):
         
        
 
-        Notification.objects.create(
-            user=gig.organizer,
-            message=f"{request.user.username} applied to your gig '{gig.title}'."
-            )
-        # Notification.cleanup_for_user(gig.organizer)
+        notify.notify(
+            gig.organizer,
+            f"{request.user.username} applied to your gig '{gig.title}'.",
+            actor=request.user,
+            group=f"gig_application:{gig.id}",
+            grouped_message=f"{{count}} people applied to your gig '{gig.title}'.",
+        )
         
         return Response({"message": f"Application sent for gig '{gig.title}'."}, status=status.HTTP_201_CREATED)
     
@@ -67,12 +69,7 @@ class ReviewApplicationView(APIView):
             application.status = 'rejected'
         application.save()
         
-        Notification.objects.create(
-            user=application.applicant,
-            message=f"Your application for '{gig.title}' was {application.status}"
-        )
-        
-        # Notification.cleanup_for_user(application.applicant)
+        notify.notify(application.applicant, f"Your application for '{gig.title}' was {application.status}")
         
         return Response({"message": f"Application {action}ed successfully."}, status=status.HTTP_200_OK)
 
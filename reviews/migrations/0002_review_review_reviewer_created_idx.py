@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gigs', '0006_gig_gig_organizer_created_idx'),
+        ('reviews', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['reviewer', 'created_at'], name='review_reviewer_created_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gigs', '0007_gig_hotness_gig_gig_organizer_hotness_idx'),
+        ('reviews', '0002_review_review_reviewer_created_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='review',
+            name='hotness',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['reviewer', '-hotness'], name='review_reviewer_hotness_idx'),
+        ),
+        # Same formula as accounts.services.trending.review_hotness.
+        migrations.RunSQL(
+            sql="""
+                UPDATE reviews_review r SET hotness =
+                    10.0 / GREATEST(date_part('day', now() - r.created_at), 1) + r.rating;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
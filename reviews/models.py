@@ -1,8 +1,9 @@
 from django.db import models
 from django.conf import settings
 from django.db.models import Avg, Count
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
+from django.utils import timezone
 
 # Create your models here.
 
@@ -13,9 +14,14 @@ class Review(models.Model):
     rating = models.PositiveSmallIntegerField(default=5)
     comment = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    hotness = models.FloatField(default=0)
     
     class Meta:
         unique_together = ("reviewer", "reviewed_user", "gig")
+        indexes = [
+            models.Index(fields=["reviewer", "created_at"], name="review_reviewer_created_idx"),
+            models.Index(fields=["reviewer", "-hotness"], name="review_reviewer_hotness_idx"),
+        ]
         
     def __str__(self):
         return f"{self.reviewer.username} - {self.reviewed_user.username}: {self.rating}"
@@ -36,4 +42,49 @@ def update_rating_on_save(sender, instance, **kwargs):
     
 @receiver(post_delete, sender=Review)
 def update_rating_on_delete(sender, instance, **kwargs):
-    update_user_rating(instance.reviewed_user)
\ No newline at end of file
+    update_user_rating(instance.reviewed_user)
+
+@receiver(pre_save, sender=Review)
+def set_review_hotness(sender, instance, **kwargs):
+    from accounts.services import trending
+
+    instance.hotness = trending.review_hotness(instance.rating, instance.created_at or timezone.now())
+
+@receiver(post_save, sender=Review)
+def update_gig_hotness_on_save(sender, instance, created, **kwargs):
+    from accounts.services import trending
+
+    if created:
+        trending.refresh_gig(instance.gig_id)
+
+@receiver(post_delete, sender=Review)
+def update_gig_hotness_on_delete(sender, instance, **kwargs):
+    from accounts.services import trending
+
+    trending.refresh_gig(instance.gig_id)
+
+@receiver(post_save, sender=Review)
+def fan_out_review_on_create(sender, instance, created, **kwargs):
+    from accounts.services import timeline
+
+    if created:
+        timeline.fan_out_review(instance)
+
+@receiver(post_delete, sender=Review)
+def remove_review_from_timelines(sender, instance, **kwargs):
+    from accounts.services import timeline
+
+    timeline.remove_activity("review", instance.id)
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_feeds_on_review_change(sender, instance, **kwargs):
+    from accounts.services import feed_cache
+    from gigs.models import Gig
+
+    feed_cache.bump_audience(instance.reviewer_id)
+
+    # The review also moves its gig's trending score.
+    organizer_id = Gig.objects.filter(id=instance.gig_id).values_list("organizer_id", flat=True).first()
+    if organizer_id and organizer_id != instance.reviewer_id:
+        feed_cache.bump_audience(organizer_id)
@@ -3,6 +3,11 @@ ASGI config for tuneUP project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve the project through this entry point (e.g. ``uvicorn tuneUP.asgi:application``)
+for ``accounts/notifications/stream/``: the Server-Sent Events view is async,
+so an open stream holds no worker thread. Under WSGI each stream would
+occupy a worker for as long as the client stays connected.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -67,6 +67,7 @@ INSTALLED_APPS = [
 	'django.contrib.sessions',
 	'django.contrib.messages',
 	'django.contrib.staticfiles',
+	'django.contrib.postgres',
   	'rest_framework',
     'corsheaders',
     'accounts', 
@@ -180,6 +181,31 @@ REST_FRAMEWORK = {
 
 
 
+# The follow graph, block sets and the feed / suggestion / search caches are
+# invalidated by bumping version keys. With several worker processes, set
+# CACHE_URL to a shared Redis (e.g. redis://localhost:6379/1, needs the redis
+# package) running with maxmemory-policy volatile-lru: version keys have no
+# expiry, so only cached values get evicted. The default is a per-process
+# LocMemCache for development.
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://tuneup'),
+}
+if CACHES['default']['BACKEND'].endswith('LocMemCache'):
+    # Culling drops keys at random, version keys included: keep it rare.
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': 100000, 'CULL_FREQUENCY': 10}
+
+
+# Notification retention (see accounts/services/notification_retention.py),
+# applied by the prune_notifications command.
+NOTIFICATION_KEEP_PER_USER = 500
+NOTIFICATION_READ_RETENTION_DAYS = 90
+
+# Fan-out for the notification stream; LocalBackend when the worker and the
+# ASGI server share one process.
+NOTIFICATION_STREAM_BACKEND = 'accounts.services.notification_stream.PostgresBackend'
+
+
+
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",
     "http://127.0.0.1:5173",